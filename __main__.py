@@ -1,10 +1,20 @@
 import os
-from time import sleep
+import argparse
 
 from dotenv import load_dotenv
 
 from libs.scraper import Scraper
+from libs.http_scraper import HttpScraper
 from libs.data_manager import DataManager
+from libs.cache_manager import CacheManager
+from libs.exporters import SheetsSink, get_file_sink
+from libs.worker_pool import run_worker_pool
+from libs.scheduler import JobScheduler, load_jobs
+from libs.google_sheets import QuotaBudget
+from libs.pipeline import PersistenceWorker
+from libs.rate_limiter import AdaptiveRateLimiter
+from libs.timing import tracer
+from libs.browser_daemon import ensure_browser
 
 # Env variables
 load_dotenv()
@@ -13,7 +23,27 @@ PAGE_LINK = os.getenv("PAGE_LINK")
 SHEET_OUTPUT = os.getenv("SHEET_OUTPUT")
 SHEET_INPUT = os.getenv("SHEET_INPUT")
 WAIT_SECONDS = int(os.getenv("WAIT_SECONDS"))
+WAIT_SECONDS_MIN = float(os.getenv("WAIT_SECONDS_MIN", WAIT_SECONDS))
+WAIT_SECONDS_MAX = float(os.getenv("WAIT_SECONDS_MAX", WAIT_SECONDS))
 SHOW_BROWSER = os.getenv("SHOW_BROWSER") == "True"
+FAST_MODE = os.getenv("FAST_MODE") == "True"
+CAPTURE_MODE = os.getenv("CAPTURE_MODE") == "True"
+FIXTURES_FOLDER = os.getenv("FIXTURES_FOLDER", "")
+BUFFER_ROWS = int(os.getenv("BUFFER_ROWS", "50"))
+BUFFER_SECONDS = int(os.getenv("BUFFER_SECONDS", "30"))
+QUEUE_SIZE = int(os.getenv("QUEUE_SIZE", "50"))
+SHEETS_QUOTA_PER_MINUTE = int(os.getenv("SHEETS_QUOTA_PER_MINUTE", "60"))
+SKIP_UNCHANGED_DATE = os.getenv("SKIP_UNCHANGED_DATE") == "True"
+LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH", "")
+REFRESH_STORE = os.getenv("REFRESH_STORE") == "True"
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES") == "True"
+BLOCKED_URLS = [url.strip() for url in os.getenv("BLOCKED_URLS", "").split(",")
+                if url.strip()]
+BROWSER_DEBUGGER_ADDRESS = os.getenv("BROWSER_DEBUGGER_ADDRESS", "")
+TRACE_PATH = os.getenv("TRACE_PATH", "")
+TRACE_SUMMARY_SECONDS = int(os.getenv("TRACE_SUMMARY_SECONDS", "300"))
+HTTP_WORKERS = int(os.getenv("HTTP_WORKERS", "8"))
+HTTP_WAIT_SECONDS = float(os.getenv("HTTP_WAIT_SECONDS", "0"))
 
 # Show settings
 print("\n----------------------------------")
@@ -23,107 +53,352 @@ print("PAGE_LINK: ", PAGE_LINK)
 print("SHEET_OUTPUT: ", SHEET_OUTPUT)
 print("SHEET_INPUT: ", SHEET_INPUT)
 print("WAIT_SECONDS: ", WAIT_SECONDS)
+print("WAIT_SECONDS_MIN: ", WAIT_SECONDS_MIN)
+print("WAIT_SECONDS_MAX: ", WAIT_SECONDS_MAX)
+print("FAST_MODE: ", FAST_MODE)
+print("CAPTURE_MODE: ", CAPTURE_MODE)
+print("BLOCK_RESOURCES: ", BLOCK_RESOURCES)
+print("BROWSER_DEBUGGER_ADDRESS: ", BROWSER_DEBUGGER_ADDRESS)
+print("LOCAL_STORE_PATH: ", LOCAL_STORE_PATH)
+print("TRACE_PATH: ", TRACE_PATH)
+print("HTTP_WORKERS: ", HTTP_WORKERS)
+print("HTTP_WAIT_SECONDS: ", HTTP_WAIT_SECONDS)
 print("----------------------------------\n")
 
 
-def main():
-    
-    # Main workflow: scrape each property found
-    # and save data in google sheets
-    current_page_link = PAGE_LINK
-    current_page = 1
+def main(workers_num: int = 1, export_paths: list = [], use_sheets: bool = True,
+         engine: str = "browser"):
+    """ Main workflow: scrape each property found
+    and save data in google sheets and / or local files
 
+    Args:
+        workers_num (int): number of browsers scraping in parallel
+        export_paths (list): files to save the properties
+            (.csv, .jsonl or .parquet)
+        use_sheets (bool): save the properties in google sheets
+        engine (str): "browser" (selenium) or "http" (api requests)
+    """
+    
     # Paths
     current_path = os.path.dirname(os.path.abspath(__file__))
     credentials_path = os.path.join(current_path, "credentials.json")
     cache_path = os.path.join(current_path, "cache.json")
 
-    # Initialize data manager
-    data_manager = DataManager(GOOGLE_SHEET_LINK, credentials_path,
-                               cache_path, SHEET_OUTPUT, SHEET_INPUT)
+    # Save timing of the scraping and sheets stages (if TRACE_PATH is set)
+    tracer.configure(TRACE_PATH, TRACE_SUMMARY_SECONDS)
+
+    # Checkpoints and destinations of the scraped properties
+    cache = CacheManager(cache_path)
+    sinks = []
+    data_manager = None
+    skip_accounts = set()
+    if use_sheets:
+        data_manager = DataManager(GOOGLE_SHEET_LINK, credentials_path,
+                                   SHEET_OUTPUT, SHEET_INPUT,
+                                   BUFFER_ROWS, BUFFER_SECONDS,
+                                   quota_per_minute=SHEETS_QUOTA_PER_MINUTE,
+                                   touch_unchanged=not SKIP_UNCHANGED_DATE,
+                                   store_path=LOCAL_STORE_PATH,
+                                   refresh_store=REFRESH_STORE)
+        
+        # Validate if user want to pull only new cases
+        print("Select an option:")
+        print("1. Pull all cases")
+        print("2. Pull only new cases")
+        input_option = input("Option: ")
+        skip_input = False
+        if input_option == "2":
+            skip_input = True
+        
+        sinks.append(SheetsSink(data_manager, skip_input))
+        
+        # Skip the input sheet properties before open their details
+        if skip_input:
+            skip_accounts = data_manager.get_input_accounts()
     
-    # Validate if user want to pull only new cases
-    print("Select an option:")
-    print("1. Pull all cases")
-    print("2. Pull only new cases")
-    input_option = input("Option: ")
-    skip_input = False
-    if input_option == "2":
-        skip_input = True
+    for export_path in export_paths:
+        print(f"Exporting properties to '{export_path}'...")
+        sinks.append(get_file_sink(export_path))
+    
+    if not sinks:
+        print("Error: No destination for the data. Use --export with --no-sheets.")
+        return
+    
+    try:
+        if engine == "http":
+            scrape_pages_http(cache, sinks)
+        else:
+            scrape_pages(workers_num, cache, sinks, skip_accounts)
+    finally:
+        for sink in sinks:
+            sink.close()
+        if data_manager:
+            print(f"Rows: {data_manager.rows_stats}")
+            print(f"Sheets api: {data_manager.get_stats()}")
+        tracer.close()
+
+    print("\n----------------------------------")
+
+
+def get_scraper_settings(page_link: str) -> dict:
+    """ Return the settings of the scraping workers (see scrape_shard)
+
+    Args:
+        page_link (str): link to the first results page
+
+    Returns:
+        dict: scraper settings
+    """
+
+    return {
+        "page_link": page_link,
+        "headless": not SHOW_BROWSER,
+        "fast_mode": FAST_MODE,
+        "capture_mode": CAPTURE_MODE,
+        "wait_seconds": WAIT_SECONDS,
+        "wait_seconds_min": WAIT_SECONDS_MIN,
+        "wait_seconds_max": WAIT_SECONDS_MAX,
+        "fixtures_folder": FIXTURES_FOLDER,
+        "block_resources": BLOCK_RESOURCES,
+        "blocked_urls": BLOCKED_URLS,
+        "debugger_address": BROWSER_DEBUGGER_ADDRESS,
+        "trace_path": TRACE_PATH,
+        "trace_summary_seconds": TRACE_SUMMARY_SECONDS,
+    }
+
+
+def run_jobs(jobs_path: str, pool_size: int, use_sheets: bool = True):
+    """ Scrape all searches of the job file in a shared pool of browsers,
+    saving each one in its own output sheet (and export files)
+
+    Args:
+        jobs_path (str): path of the json job file (see load_jobs)
+        pool_size (int): max browsers running at the same time
+        use_sheets (bool): save the properties in google sheets
+    """
+
+    # Paths
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    credentials_path = os.path.join(current_path, "credentials.json")
+    jobs_cache_path = os.path.join(current_path, "jobs_cache")
+
+    tracer.configure(TRACE_PATH, TRACE_SUMMARY_SECONDS)
+
+    # Destinations of each job (all sheets share the quota of the project)
+    jobs = load_jobs(jobs_path)
+    budget = QuotaBudget(SHEETS_QUOTA_PER_MINUTE, SHEETS_QUOTA_PER_MINUTE)
+    data_managers = {}
+    try:
+        for job in jobs:
+            print(f"Loading job {job['name']}...")
+            job["sinks"] = []
+            if use_sheets and job["sheet_output"]:
+                data_manager = DataManager(job["google_sheet_link"] or GOOGLE_SHEET_LINK,
+                                           credentials_path,
+                                           job["sheet_output"], job["sheet_input"],
+                                           BUFFER_ROWS, BUFFER_SECONDS,
+                                           touch_unchanged=not SKIP_UNCHANGED_DATE,
+                                           store_path=job["store_path"],
+                                           refresh_store=REFRESH_STORE,
+                                           budget=budget)
+                data_managers[job["name"]] = data_manager
+                job["sinks"].append(SheetsSink(data_manager, job["skip_input"]))
+                if job["skip_input"]:
+                    job["skip_accounts"] = data_manager.get_input_accounts()
+            for export_path in job["export"]:
+                job["sinks"].append(get_file_sink(export_path))
+
+            if not job["sinks"]:
+                raise ValueError(f"Job '{job['name']}' without output sheet or export")
+
+        scheduler = JobScheduler(jobs, pool_size, get_scraper_settings(""),
+                                 jobs_cache_path)
+        scheduler.run()
+    finally:
+        for job in jobs:
+            for sink in job.get("sinks", []):
+                sink.close()
+        for name, data_manager in data_managers.items():
+            print(f"Job {name}: Rows: {data_manager.rows_stats}")
+            print(f"Job {name}: Sheets api: {data_manager.get_stats()}")
+        tracer.close()
+
+    print("\n----------------------------------")
+
+
+def scrape_pages(workers_num: int, cache: CacheManager, sinks: list,
+                 skip_accounts: set = set()):
+    """ Scrape all results pages (from the last checkpoint) and save
+    the properties in the sinks
+
+    Args:
+        workers_num (int): number of browsers scraping in parallel
+        cache (CacheManager): checkpoints of the scraping
+        sinks (list): destinations of the properties (see RecordSink)
+        skip_accounts (set): account keys to skip before open their
+            details (see get_account_key)
+    """
+    
+    current_page = 1
+        
+    # Scrape pages in parallel, with a browser by worker
+    if workers_num > 1:
+        settings = get_scraper_settings(PAGE_LINK)
+        settings["skip_accounts"] = skip_accounts
+        run_worker_pool(workers_num, cache, sinks, settings)
+        return
     
     # Validate last page scraped and last status
-    cache = data_manager.get_cache()
-    if cache["last_page"] and not cache["finished"]:
-        print(f"Resuming scraping from page '{cache['last_page']}'...")
-        current_page_link = cache["last_page"]
-        current_page = cache["last_page_num"]
+    cache_data = cache.get_cache()
+    if cache_data["last_page"] and not cache_data["finished"]:
+        current_page = cache_data["last_page_num"]
+        print(f"Resuming scraping from page {current_page}...")
         
-    # Initialize scraper
-    scraper = Scraper(current_page_link, not SHOW_BROWSER)
+    # Initialize scraper, waiting between WAIT_SECONDS_MIN and
+    # WAIT_SECONDS_MAX between properties, with the site load times
+    rate_limiter = AdaptiveRateLimiter(WAIT_SECONDS_MIN, WAIT_SECONDS_MAX)
+    # Reuse the warm browser (started now if it is not running)
+    if BROWSER_DEBUGGER_ADDRESS:
+        ensure_browser(BROWSER_DEBUGGER_ADDRESS, not SHOW_BROWSER)
+    scraper = Scraper(PAGE_LINK, not SHOW_BROWSER, CAPTURE_MODE,
+                      rate_limiter, BLOCK_RESOURCES, BLOCKED_URLS,
+                      BROWSER_DEBUGGER_ADDRESS)
+    
+    # Go directly to the resumed page
+    has_page = scraper.go_to_page(current_page)
     
     # Scraping counters
     current_property = (current_page - 1) * 10 + 1
 
-    while True:
-
-        current_page_link = scraper.driver.current_url
-        data_manager.update_page_cache(current_page_link, current_page, False)
-
-        print(f"Scraping page {current_page}...")
-
-        # Extract the properties from current results page
-        for property_index in range(2, 12):
-
-            # Open property details
-            property_found = scraper.open_property_details(property_index)
-            if not property_found:
-                break
-
-            # Extract property data
-            print(f"\tScraping property {current_property}...")
-            data = scraper.get_property_data()
-            if data:
-                
-                # Skip property if found in input sheet
-                account_number = data["account_number"]
-                print(f"\t\tAccount number: {account_number}")
-                account_row_input = data_manager.get_account_number_row(
-                    account_number,
-                    SHEET_INPUT
-                )
-                if account_row_input and skip_input:
-                    print("\t\tProperty found in input sheet. Skipping...")
-                    scraper.close_property_details()
-                    sleep(WAIT_SECONDS)
-                    current_property += 1
-                    continue
-
-                # Validate new case status
-                old_status = data_manager.get_case_status(account_number)
-                
-                # Update or insert data
-                if old_status:
-                    print("\t\tUpdating property...")
-                    data_manager.update_property(data)
-                else:
-                    print("\t\tInserting property...")
-                    data_manager.insert_property(data)
-
-            # Close property details and wait
-            scraper.close_property_details()
-            sleep(WAIT_SECONDS)
-            current_property += 1
-
-        # Go to next results page
-        has_next = scraper.go_next_page()
-        if not has_next:
-            data_manager.update_page_cache(current_page_link, 1, True)
-            print("No more results. Done.")
-            break
-        current_page += 1
+    # Save data in the sinks in background, while the browser keeps
+    # scraping (pending data is saved when the scraping ends or fails)
+    persistence = PersistenceWorker(cache, sinks, QUEUE_SIZE)
+    persistence.start()
+    try:
+        while has_page:
 
-    print("\n----------------------------------")
+            current_page_link = scraper.get_page_link(current_page)
+            persistence.put({
+                "type": "page",
+                "page_link": current_page_link,
+                "page_num": current_page,
+            })
+
+            print(f"Scraping page {current_page}...")
+
+            # Extract the properties from current results page
+            page_properties = scraper.iter_page_properties(
+                FAST_MODE,
+                WAIT_SECONDS,
+                FIXTURES_FOLDER,
+                skip_accounts
+            )
+            for data in page_properties:
+                print(f"\tScraping property {current_property}...")
+                persistence.put({"type": "property", "data": data})
+                current_property += 1
+
+            # Go to next results page
+            has_page = scraper.go_next_page()
+            current_page += 1
+
+        persistence.put({
+            "type": "done",
+            "page_link": PAGE_LINK,
+            "page_num": 1,
+        })
+        print("No more results. Done.")
+    finally:
+        persistence.close()
+
+
+def scrape_pages_http(cache: CacheManager, sinks: list):
+    """ Scrape all results pages (from the last checkpoint) with direct
+    requests to the search and details api, and save the properties
+    in the sinks. Require the cookies of the terms of service
+    (saved by the browser engine)
+
+    Args:
+        cache (CacheManager): checkpoints of the scraping
+        sinks (list): destinations of the properties (see RecordSink)
+    """
+
+    # Resume from the last page scraped (same page numbers as the browser)
+    start_page = 1
+    cache_data = cache.get_cache()
+    if cache_data["last_page"] and not cache_data["finished"]:
+        start_page = cache_data["last_page_num"]
+        print(f"Resuming scraping from page {start_page}...")
+
+    rate_limiter = None
+    if HTTP_WAIT_SECONDS:
+        rate_limiter = AdaptiveRateLimiter(HTTP_WAIT_SECONDS, WAIT_SECONDS_MAX)
+    scraper = HttpScraper(PAGE_LINK, HTTP_WORKERS, rate_limiter=rate_limiter)
+
+    # Checkpoints keep the results page link (also valid for the browser)
+    current_property = (start_page - 1) * scraper.page_size + 1
+    persistence = PersistenceWorker(cache, sinks, QUEUE_SIZE)
+    persistence.start()
+    try:
+        for page_num, page_properties in scraper.iter_pages(start_page):
+            persistence.put({
+                "type": "page",
+                "page_link": PAGE_LINK,
+                "page_num": page_num,
+            })
+
+            print(f"Scraping page {page_num}...")
+            for data in page_properties:
+                print(f"\tScraping property {current_property}...")
+                persistence.put({"type": "property", "data": data})
+                current_property += 1
+
+        persistence.put({
+            "type": "done",
+            "page_link": PAGE_LINK,
+            "page_num": 1,
+        })
+        print("No more results. Done.")
+    finally:
+        persistence.close()
+        scraper.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Taxsales Lgbs Bot")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of browsers scraping result pages in parallel "
+             "(with --jobs, size of the shared pool, default CPU count)"
+    )
+    parser.add_argument(
+        "--export",
+        action="append",
+        default=[],
+        help="file to save the properties (.csv, .jsonl or .parquet), "
+             "can be used many times"
+    )
+    parser.add_argument(
+        "--no-sheets",
+        action="store_true",
+        help="do not save the properties in google sheets (use with --export)"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["browser", "http"],
+        default="browser",
+        help="scrape with chrome (browser) or with direct api requests (http)"
+    )
+    parser.add_argument(
+        "--jobs",
+        default="",
+        help="json file with many searches to scrape in the same run "
+             "(see libs/scheduler.py)"
+    )
+    args = parser.parse_args()
+    if args.jobs:
+        run_jobs(args.jobs, args.workers or os.cpu_count() or 1, not args.no_sheets)
+    else:
+        main(args.workers or 1, args.export, not args.no_sheets, args.engine)
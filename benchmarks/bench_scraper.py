@@ -0,0 +1,227 @@
+""" End to end throughput benchmark of Scraper against the local fixture site
+
+Usage (from the project folder):
+    python -m benchmarks.bench_scraper --listings 50 --latency 0.05 --mode modal
+    python -m benchmarks.bench_scraper --listings 500 --latency 0.05 --mode http
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+from libs.scraper import Scraper
+from libs.http_scraper import HttpScraper
+from libs.stub_server import StubServer
+from benchmarks.fixture_site import build_fixture_site
+
+
+# Scraper methods timed as stages
+STAGES = [
+    "open_property_details",
+    "get_property_data",
+    "close_property_details",
+    "get_page_properties",
+    "get_captured_properties",
+    "go_next_page",
+]
+
+# HttpScraper methods timed as stages
+HTTP_STAGES = [
+    "get_search_page",
+    "get_details",
+]
+
+
+class StageTimer():
+    """ Save the duration of each call of the scraper stages """
+
+    def __init__(self):
+        self.durations = {}
+
+    def wrap(self, scraper, stage: str):
+        """ Replace a scraper method with a timed version
+
+        Args:
+            scraper (Scraper or HttpScraper): scraper instance
+            stage (str): name of the method
+        """
+
+        method = getattr(scraper, stage)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                self.durations.setdefault(stage, []).append(duration)
+
+        setattr(scraper, stage, timed)
+
+    def summary(self) -> dict:
+        """ Return count, total and mean/max seconds of each stage """
+
+        summary = {}
+        for stage, durations in self.durations.items():
+            summary[stage] = {
+                "calls": len(durations),
+                "total": round(sum(durations), 4),
+                "mean": round(statistics.mean(durations), 4),
+                "max": round(max(durations), 4),
+            }
+        return summary
+
+
+def run_benchmark(listings_num: int, latency: float, mode: str,
+                  show_browser: bool = False, block_resources: bool = False) -> dict:
+    """ Scrape all the fixture site and measure the throughput
+
+    Args:
+        listings_num (int): number of listings in the fixture site
+        latency (float): seconds of latency of each request
+        mode (str): "modal", "fast" (angular scope), "capture" (api responses)
+            or "http" (direct api requests, without browser)
+        show_browser (bool): run chrome with interface
+        block_resources (bool): block images, fonts and analytics
+
+    Returns:
+        dict: benchmark results
+    """
+
+    with tempfile.TemporaryDirectory() as folder, \
+            tempfile.TemporaryDirectory() as session_folder:
+        build_fixture_site(folder, listings_num)
+        stub_server = StubServer(folder, latency=latency)
+        base_url = stub_server.start()
+
+        # Session of the fixture site (the saved terms session is not replaced)
+        cookies_path = os.path.join(session_folder, "cookies.pkl")
+
+        scraper = None
+        try:
+            if mode == "http":
+                return run_http_benchmark(base_url, listings_num, latency)
+
+            start = time.perf_counter()
+            scraper = Scraper(f"{base_url}/", not show_browser, mode == "capture",
+                              block_resources=block_resources,
+                              cookies_path=cookies_path)
+            startup_time = time.perf_counter() - start
+
+            timer = StageTimer()
+            for stage in STAGES:
+                timer.wrap(scraper, stage)
+
+            properties_num = 0
+            first_property_time = None
+            while True:
+                page_properties = scraper.iter_page_properties(mode == "fast")
+                for _ in page_properties:
+                    properties_num += 1
+                    if first_property_time is None:
+                        first_property_time = time.perf_counter() - start
+
+                if not scraper.go_next_page():
+                    break
+
+            total_time = time.perf_counter() - start
+        finally:
+            if scraper:
+                scraper.end_browser()
+            stub_server.stop()
+
+    return {
+        "mode": mode,
+        "block_resources": block_resources,
+        "listings": listings_num,
+        "latency": latency,
+        "properties": properties_num,
+        "total_seconds": round(total_time, 3),
+        "properties_per_second": round(properties_num / total_time, 3),
+        "startup_seconds": round(startup_time, 3),
+        "time_to_first_property": round(first_property_time or 0, 3),
+        "stages": timer.summary(),
+    }
+
+
+def run_http_benchmark(base_url: str, listings_num: int, latency: float,
+                       workers: int = 8) -> dict:
+    """ Scrape all the fixture site with HttpScraper
+
+    Args:
+        base_url (str): url of the running stub server
+        listings_num (int): number of listings in the fixture site
+        latency (float): seconds of latency of each request
+        workers (int): concurrent requests
+
+    Returns:
+        dict: benchmark results (same keys as run_benchmark)
+    """
+
+    start = time.perf_counter()
+    scraper = HttpScraper(f"{base_url}/", workers, cookies_path="")
+    startup_time = time.perf_counter() - start
+
+    timer = StageTimer()
+    for stage in HTTP_STAGES:
+        timer.wrap(scraper, stage)
+
+    properties_num = 0
+    first_property_time = None
+    try:
+        for _, page_properties in scraper.iter_pages():
+            for _ in page_properties:
+                properties_num += 1
+                if first_property_time is None:
+                    first_property_time = time.perf_counter() - start
+    finally:
+        scraper.close()
+    total_time = time.perf_counter() - start
+
+    return {
+        "mode": "http",
+        "block_resources": False,
+        "listings": listings_num,
+        "latency": latency,
+        "properties": properties_num,
+        "total_seconds": round(total_time, 3),
+        "properties_per_second": round(properties_num / total_time, 3),
+        "startup_seconds": round(startup_time, 3),
+        "time_to_first_property": round(first_property_time or 0, 3),
+        "stages": timer.summary(),
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Scraper throughput benchmark")
+    parser.add_argument("--listings", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="seconds of latency of each request")
+    parser.add_argument("--mode", choices=["modal", "fast", "capture", "http"],
+                        default="modal")
+    parser.add_argument("--show-browser", action="store_true")
+    parser.add_argument("--block-resources", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print json output")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.listings, args.latency, args.mode,
+                            args.show_browser, args.block_resources)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print("\n----------------------------------")
+        print(f"Mode: {results['mode']}")
+        print(f"Properties: {results['properties']} / {results['listings']}")
+        print(f"Total: {results['total_seconds']}s")
+        print(f"Properties/second: {results['properties_per_second']}")
+        print(f"Startup: {results['startup_seconds']}s")
+        print(f"Time to first property: {results['time_to_first_property']}s")
+        print("Stages:")
+        for stage, stage_summary in results["stages"].items():
+            print(f"\t{stage}: {stage_summary}")
+        print("----------------------------------")
@@ -0,0 +1,166 @@
+""" Sheets api calls benchmark of DataManager, with the in memory client
+
+Usage (from the project folder):
+    python -m benchmarks.bench_sheets --records 10000 --existing 5000
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+
+from libs.data_manager import DataManager
+from libs.property_data import build_property_data, listing_to_raw_data
+from benchmarks.fake_sheets import FakeClient
+from benchmarks.fixture_site import get_listing
+
+
+# Columns titles of the output sheet (same order of OUTPUT_FIELDS)
+HEADERS = [
+    "Property Street", "City", "State", "Zip Code", "County", "Maps Link",
+    "Sale Date", "Status", "Sale Type", "Date Pulled", "Sale Notes",
+    "Judgment Date", "Adjudged Value", "Est Min Bid", "Equity",
+    "Equity Percent", "Account Number", "Case Number", "Case Style", "Link",
+    "Address Error",
+]
+
+
+def get_records(records_num: int, seed: int = 1) -> list:
+    """ Generate synthetic property records
+
+    Args:
+        records_num (int): number of records
+        seed (int): seed of the random data
+
+    Returns:
+        list: properties data (see build_property_data)
+    """
+
+    rand = random.Random(seed)
+    records = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(1, records_num + 1):
+            listing = get_listing(index, rand)
+            raw_data = listing_to_raw_data(listing)
+            records.append(build_property_data(raw_data, "http://localhost/"))
+    return records
+
+
+def run_benchmark(records_num: int, existing_num: int, latency: float = 0,
+                  error_rate: float = 0, buffer_rows: int = 50,
+                  quota_per_minute: int = 0, use_store: bool = False) -> dict:
+    """ Save synthetic records with DataManager and count the api calls
+
+    Args:
+        records_num (int): number of records to save
+        existing_num (int): records already in the output sheet (updates)
+        latency (float): seconds of latency of each api call
+        error_rate (float): probability of 429 errors in each api call
+        buffer_rows (int): rows by batch write
+        quota_per_minute (int): max calls by minute of the client and
+            of the local budget (0 to disable)
+        use_store (bool): save the output rows in a local database
+            (loaded from the sheet in the first run)
+
+    Returns:
+        dict: benchmark results
+    """
+
+    records = get_records(records_num)
+
+    # Output sheet with the existing records and empty input sheet
+    client = FakeClient(latency=latency, error_rate=error_rate,
+                        quota_per_minute=quota_per_minute)
+    existing_rows = [list(map(str, record.to_row()))
+                     for record in records[:existing_num]]
+    client.spreadsheet.add_worksheet("Output", [HEADERS] + existing_rows)
+    client.spreadsheet.add_worksheet("Input", [HEADERS])
+
+    with tempfile.TemporaryDirectory() as folder:
+        store_path = os.path.join(folder, "store.db") if use_store else ""
+
+        start = time.perf_counter()
+        setup_calls = 0
+        sheets_stats = {}
+        rows_stats = {}
+        error = ""
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                data_manager = DataManager("fake", "", "Output", "Input",
+                                           buffer_rows, client=client,
+                                           quota_per_minute=quota_per_minute,
+                                           store_path=store_path)
+                setup_calls = len(client.calls)
+                for record in records:
+                    data_manager.save_property(record)
+                data_manager.flush()
+                sheets_stats = data_manager.get_stats()
+                rows_stats = data_manager.rows_stats
+                if data_manager.store:
+                    data_manager.store.close()
+            except Exception as exception:
+                error = f"{type(exception).__name__}: {exception}"
+        total_time = time.perf_counter() - start
+
+    summary = client.get_summary()
+    calls_num = summary["total"] - setup_calls
+    return {
+        "records": records_num,
+        "existing": existing_num,
+        "latency": latency,
+        "error_rate": error_rate,
+        "wall_seconds": round(total_time, 3),
+        "setup_calls": setup_calls,
+        "calls": summary["total"],
+        "calls_per_property": round(calls_num / records_num, 4),
+        "reads": summary["read"],
+        "writes": summary["write"],
+        "quota_errors": summary["errors"],
+        "methods": summary["methods"],
+        "rows": rows_stats,
+        "retries": sheets_stats.get("retries", 0),
+        "backoff_seconds": sheets_stats.get("backoff_seconds", 0),
+        "throttle_seconds": sheets_stats.get("throttle_seconds", 0),
+        "error": error,
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Sheets api calls benchmark")
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--existing", type=int, default=5000,
+                        help="records already in the output sheet")
+    parser.add_argument("--latency", type=float, default=0,
+                        help="seconds of latency of each api call")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="probability of 429 errors in each api call")
+    parser.add_argument("--buffer-rows", type=int, default=50)
+    parser.add_argument("--quota", type=int, default=0,
+                        help="max calls by minute (0 to disable)")
+    parser.add_argument("--store", action="store_true",
+                        help="save the output rows in a local database")
+    parser.add_argument("--json", action="store_true", help="print json output")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.records, args.existing, args.latency,
+                            args.error_rate, args.buffer_rows, args.quota,
+                            args.store)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print("\n----------------------------------")
+        for key, value in results.items():
+            print(f"{key}: {value}")
+        print("----------------------------------")
+
+    # Failed runs must not look like valid results
+    if results["error"]:
+        print(f"Error: Benchmark failed: {results['error']}", file=sys.stderr)
+        sys.exit(1)
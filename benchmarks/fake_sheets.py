@@ -0,0 +1,250 @@
+import time
+import random
+
+import gspread
+from gspread.utils import a1_range_to_grid_range, numericise_all
+
+
+class FakeResponse():
+    """ Minimal http response used to raise gspread.exceptions.APIError """
+
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self.text = message
+
+    def json(self) -> dict:
+        return {
+            "error": {
+                "code": self.status_code,
+                "message": self.text,
+                "status": "RESOURCE_EXHAUSTED",
+            }
+        }
+
+
+class FakeClient():
+    """ In memory replacement of gspread.Client, to use in SheetsManager
+    (client param). Save every api call and can add latency and quota errors
+    """
+
+    def __init__(self, latency: float = 0, error_rate: float = 0,
+                 quota_per_minute: int = 0, seed: int = 1):
+        """ Construtor of the class
+
+        Args:
+            latency (float): seconds to wait in each api call
+            error_rate (float): probability (0 to 1) of a 429 error in each call
+            quota_per_minute (int): max calls in 60 seconds, as the real api
+                (0 to disable)
+            seed (int): seed of the random errors
+        """
+
+        self.latency = latency
+        self.error_rate = error_rate
+        self.quota_per_minute = quota_per_minute
+        self.random = random.Random(seed)
+
+        # Api calls: {method (str), kind ("read" or "write"), seconds (float)}
+        self.calls = []
+        self.errors = 0
+        self.spreadsheet = FakeSpreadsheet(self)
+
+    def request(self, method: str, kind: str):
+        """ Register an api call, wait the latency and raise quota errors
+
+        Args:
+            method (str): name of the gspread method
+            kind (str): "read" or "write"
+        """
+
+        start = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+
+        # Quota errors: random or when the calls per minute are exceeded
+        now = time.monotonic()
+        is_error = bool(self.error_rate) and self.random.random() < self.error_rate
+        if self.quota_per_minute:
+            last_minute_calls = [call for call in self.calls
+                                 if now - call["time"] < 60 and not call["error"]]
+            if len(last_minute_calls) >= self.quota_per_minute:
+                is_error = True
+
+        self.calls.append({
+            "method": method,
+            "kind": kind,
+            "time": now,
+            "seconds": time.perf_counter() - start,
+            "error": is_error,
+        })
+
+        if is_error:
+            self.errors += 1
+            response = FakeResponse(429, "Quota exceeded (fake client)")
+            raise gspread.exceptions.APIError(response)
+
+    def open_by_url(self, url: str):
+        self.request("open_by_url", "read")
+        return self.spreadsheet
+
+    def get_summary(self) -> dict:
+        """ Return the number of calls by method and kind """
+
+        summary = {"total": len(self.calls), "errors": self.errors,
+                   "read": 0, "write": 0, "methods": {}}
+        for call in self.calls:
+            summary[call["kind"]] += 1
+            methods = summary["methods"]
+            methods[call["method"]] = methods.get(call["method"], 0) + 1
+        return summary
+
+
+class FakeSpreadsheet():
+    """ In memory replacement of gspread.Spreadsheet """
+
+    def __init__(self, client: FakeClient):
+        self.client = client
+        self.id = "fake-spreadsheet"
+        self.worksheets = {}
+
+    def add_worksheet(self, title: str, rows: list = None):
+        """ Create a worksheet (without api call, to prepare the benchmark)
+
+        Args:
+            title (str): title of the worksheet
+            rows (list): initial values, with the headers in the first row
+        """
+
+        worksheet_id = len(self.worksheets)
+        self.worksheets[title] = FakeWorksheet(self, title, worksheet_id, rows)
+        return self.worksheets[title]
+
+    @property
+    def sheet1(self):
+        self.client.request("sheet1", "read")
+        return list(self.worksheets.values())[0]
+
+    def worksheet(self, title: str):
+        self.client.request("worksheet", "read")
+        if title not in self.worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.worksheets[title]
+
+    def values_batch_update(self, params=None, body=None):
+        self.client.request("values_batch_update", "write")
+        for range_data in body["data"]:
+            title, cell_range = range_data["range"].rsplit("!", 1)
+            worksheet = self.worksheets[title.strip("'")]
+            worksheet.set_values(cell_range, range_data["values"])
+        return {}
+
+    def batch_update(self, body: dict):
+        self.client.request("batch_update", "write")
+        for request in body["requests"]:
+            if "repeatCell" not in request:
+                continue
+            grid_range = request["repeatCell"]["range"]
+            worksheets = {worksheet.id: worksheet
+                          for worksheet in self.worksheets.values()}
+            worksheet = worksheets[grid_range["sheetId"]]
+            color = request["repeatCell"]["cell"]["userEnteredFormat"]
+            for row in range(grid_range["startRowIndex"], grid_range["endRowIndex"]):
+                worksheet.formats[row + 1] = color
+        return {}
+
+
+class FakeWorksheet():
+    """ In memory replacement of gspread.Worksheet """
+
+    def __init__(self, spreadsheet: FakeSpreadsheet, title: str,
+                 worksheet_id: int, rows: list = None):
+        self.spreadsheet = spreadsheet
+        self.client = spreadsheet.client
+        self.title = title
+        self.id = worksheet_id
+        self.values = [list(row) for row in rows or []]
+
+        # Background colors by row number
+        self.formats = {}
+
+    def set_values(self, cell_range: str, values: list):
+        """ Write values in a range, growing the sheet if required
+
+        Args:
+            cell_range (str): range in A1 notation
+            values (list): rows of values
+        """
+
+        grid_range = a1_range_to_grid_range(cell_range)
+        start_row = grid_range.get("startRowIndex", 0)
+        start_col = grid_range.get("startColumnIndex", 0)
+        for row_offset, row_values in enumerate(values):
+            row_index = start_row + row_offset
+            while len(self.values) <= row_index:
+                self.values.append([])
+            row = self.values[row_index]
+            for col_offset, value in enumerate(row_values):
+                col_index = start_col + col_offset
+                while len(row) <= col_index:
+                    row.append("")
+                if isinstance(value, bool):
+                    value = str(value).upper()
+                row[col_index] = str(value)
+
+    def get_all_values(self) -> list:
+        self.client.request("get_all_values", "read")
+        return self.__get_trimmed_values__()
+
+    def __get_trimmed_values__(self) -> list:
+        """ Return rows as the api: without trailing empty rows """
+
+        values = [list(row) for row in self.values]
+        while values and not any(values[-1]):
+            values.pop()
+        width = max((len(row) for row in values), default=0)
+        return [row + [""] * (width - len(row)) for row in values]
+
+    def get_all_records(self) -> list:
+        self.client.request("get_all_records", "read")
+        values = self.__get_trimmed_values__()
+        if not values:
+            return []
+        headers = values[0]
+        return [dict(zip(headers, numericise_all(row, default_blank="")))
+                for row in values[1:]]
+
+    def row_values(self, row: int) -> list:
+        self.client.request("row_values", "read")
+        if row > len(self.values):
+            return []
+        return list(self.values[row - 1])
+
+    def col_values(self, col: int) -> list:
+        self.client.request("col_values", "read")
+        column = [row[col - 1] if len(row) >= col else "" for row in self.values]
+        while column and not column[-1]:
+            column.pop()
+        return column
+
+    def get(self, cell_range: str) -> list:
+        self.client.request("get", "read")
+        grid_range = a1_range_to_grid_range(cell_range)
+        rows = self.values[grid_range.get("startRowIndex", 0):
+                           grid_range.get("endRowIndex", len(self.values))]
+        start_col = grid_range.get("startColumnIndex", 0)
+        end_col = grid_range.get("endColumnIndex")
+        return [row[start_col:end_col] for row in rows]
+
+    def update(self, cell_range: str, values: list = None, **kwargs):
+        self.client.request("update", "write")
+        self.set_values(cell_range, values)
+
+    def update_cell(self, row: int, col: int, value):
+        self.client.request("update_cell", "write")
+        cell_range = gspread.utils.rowcol_to_a1(row, col)
+        self.set_values(cell_range, [[value]])
+
+    def delete_row(self, row: int):
+        self.client.request("delete_row", "write")
+        if row <= len(self.values):
+            del self.values[row - 1]
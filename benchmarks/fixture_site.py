@@ -0,0 +1,233 @@
+import os
+import random
+
+from libs.stub_server import save_fixture
+
+
+# Replica of the LGBS search page: same selectors used by Scraper, with a
+# minimal angular shim (scope listing, $http pending requests, toJson and
+# pagination selectPage). The first page is read from the "page" or
+# "offset" params of the url
+INDEX_HTML = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Taxsales fixture</title>
+    <style>
+        .modal { position: fixed; top: 10%; left: 10%; background: white; }
+        .modal-backdrop { position: fixed; inset: 0; background: rgba(0, 0, 0, .3); }
+        .hidden { display: none; }
+    </style>
+</head>
+<body ng-app="app">
+
+    <div id="terms" class="modal">
+        <p>Terms of service</p>
+        <button ng-click="dm.agree()">Agree</button>
+    </div>
+
+    <div class="result-body"></div>
+
+    <ul class="pagination">
+        <li class="pagination-next"><a href="">Next</a></li>
+    </ul>
+
+    <div id="details" class="modal hidden"></div>
+
+    <script>
+    (function () {
+        const pageSize = 10;
+        const params = new URLSearchParams(window.location.search);
+        let currentPage = parseInt(params.get("page"), 10)
+            || Math.floor((parseInt(params.get("offset"), 10) || 0) / pageSize) + 1;
+        let total = 0;
+        let pending = [];
+
+        // Scope of the pagination directive
+        const pagination = document.querySelector(".pagination");
+        pagination.__isolateScope__ = {
+            page: 0,
+            totalPages: 0,
+            selectPage: function (page) {
+                if (page > 0 && page <= this.totalPages && page !== this.page) {
+                    loadPage(page);
+                }
+            }
+        };
+
+        // Angular shim used by the scraper
+        window.angular = {
+            element: function (elem) {
+                return {
+                    scope: function () { return elem.__scope__ || null; },
+                    isolateScope: function () { return elem.__isolateScope__ || null; },
+                    injector: function () {
+                        return {
+                            get: function () { return {pendingRequests: pending}; }
+                        };
+                    }
+                };
+            },
+            toJson: function (obj) {
+                return JSON.stringify(obj, function (key, value) {
+                    return key.startsWith("$$") ? undefined : value;
+                });
+            }
+        };
+
+        function request(url, callback) {
+            const xhr = new XMLHttpRequest();
+            pending.push(xhr);
+            xhr.open("GET", url);
+            xhr.onload = function () {
+                pending.splice(pending.indexOf(xhr), 1);
+                callback(JSON.parse(xhr.responseText));
+            };
+            xhr.send();
+        }
+
+        function openDetails(listing) {
+            const detailsUrl = "/api/property_sales/" + listing.account_nbr + "/";
+            request(detailsUrl, function (data) {
+                const details = document.getElementById("details");
+                details.innerHTML = `
+                    <h1>${data.prop_address_one}, ${data.prop_city} ${data.prop_state} ${data.prop_zipcode}</h1>
+                    <br><a href="https://www.google.com/maps/search/?api=1&query=${data.geometry.coordinates[1]},${data.geometry.coordinates[0]}">Map</a>
+                    <dl>
+                        <dt>County</dt><dd>${data.county}</dd>
+                        <dt>Sale type</dt><dd>${data.sale_type}</dd>
+                        <dt>Sale date</dt><dd>${data.sale_date}</dd>
+                        <dt>Account</dt><dd>${data.account_nbr}</dd>
+                        <dt>Adjudged value</dt><dd>$${data.value}</dd>
+                        <dt>Minimum bid</dt><dd>$${data.minimum_bid}</dd>
+                        <dt>Status</dt><dd>${data.status}</dd>
+                    </dl>
+                    <h3>Case</h3>
+                    <dl>
+                        <dt>Court</dt><dd>1</dd>
+                        <dt>Tax years</dt><dd>2020-2024</dd>
+                        <dt>Plaintiff</dt><dd>County</dd>
+                        <dt>Cause</dt><dd>${data.cause_nbr}</dd>
+                        <dt>Precinct</dt><dd>1</dd>
+                        <dt>Lot</dt><dd>1</dd>
+                        <dt>Style</dt><dd>${data.style}</dd>
+                        <dt>Judgment date</dt><dd>${data.judgment_date}</dd>
+                        <dt>Notes</dt><dd>${data.sale_notes}</dd>
+                    </dl>
+                    <button ng-click="detailmodal.close()">Close</button>`;
+                details.querySelector('[ng-click="detailmodal.close()"]').onclick = closeDetails;
+                details.classList.remove("hidden");
+                document.body.classList.add("modal-open");
+                const backdrop = document.createElement("div");
+                backdrop.className = "modal-backdrop";
+                document.body.appendChild(backdrop);
+            });
+        }
+
+        function closeDetails() {
+            setTimeout(function () {
+                document.getElementById("details").classList.add("hidden");
+                document.getElementById("details").innerHTML = "";
+                document.body.classList.remove("modal-open");
+                document.querySelectorAll(".modal-backdrop").forEach(elem => elem.remove());
+            }, 50);
+        }
+
+        function loadPage(page) {
+            const offset = (page - 1) * pageSize;
+            const url = "/api/property_sales/?limit=" + pageSize + "&offset=" + offset;
+            request(url, function (data) {
+                currentPage = page;
+                total = data.count;
+                pagination.__isolateScope__.page = page;
+                pagination.__isolateScope__.totalPages = Math.ceil(total / pageSize);
+                const results = document.querySelector(".result-body");
+                results.innerHTML = '<div class="ng-scope">Results</div>';
+                data.results.forEach(function (listing) {
+                    const row = document.createElement("section");
+                    row.className = "ng-scope";
+                    row.innerHTML = `<span>${listing.account_nbr}</span>
+                        <span>${listing.status}</span>
+                        <span>${listing.sale_date}</span>
+                        <a ng-click="listing.openDetailModal()">Details</a>`;
+                    row.__scope__ = {listing: listing};
+                    row.querySelector("a").onclick = function () { openDetails(listing); };
+                    results.appendChild(row);
+                });
+                const next = document.querySelector(".pagination-next");
+                next.classList.toggle("disabled", offset + pageSize >= total);
+            });
+        }
+
+        document.querySelector(".pagination-next > a").onclick = function (event) {
+            event.preventDefault();
+            loadPage(currentPage + 1);
+        };
+
+        document.querySelector('[ng-click="dm.agree()"]').onclick = function () {
+            document.getElementById("terms").classList.add("hidden");
+            loadPage(currentPage);
+        };
+    })();
+    </script>
+</body>
+</html>
+"""
+
+
+def get_listing(index: int, rand: random.Random) -> dict:
+    """ Generate a fake listing with the keys of the LGBS api
+
+    Args:
+        index (int): number of the listing
+        rand (random.Random): random generator
+
+    Returns:
+        dict: listing data
+    """
+
+    value = rand.randint(10, 500) * 1000
+    return {
+        "account_nbr": f"{index:012d}",
+        "prop_address_one": f"{rand.randint(1, 9999)} Main St",
+        "prop_city": rand.choice(["HOUSTON", "DALLAS", "SAN ANTONIO"]),
+        "prop_state": "TX",
+        "prop_zipcode": f"77{rand.randint(0, 999):03d}",
+        "county": "Harris",
+        "sale_type": "SALE",
+        "sale_date": "01/06/2027",
+        "value": value,
+        "minimum_bid": int(value * rand.uniform(0.1, 0.9)),
+        "status": rand.choice(["Scheduled for Auction", "Cancelled", "Struck Off"]),
+        "cause_nbr": f"2024-{index:05d}",
+        "style": "County vs Owner",
+        "judgment_date": "03/15/2024",
+        "sale_notes": "",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [rand.uniform(-96, -95), rand.uniform(29, 30)]
+        },
+    }
+
+
+def build_fixture_site(folder: str, listings_num: int = 100, seed: int = 1):
+    """ Write the replica page and its api fixtures in a folder,
+    to be served with StubServer
+
+    Args:
+        folder (str): destination folder
+        listings_num (int): number of listings in the search results
+        seed (int): seed of the random data
+    """
+
+    rand = random.Random(seed)
+    listings = [get_listing(index, rand) for index in range(1, listings_num + 1)]
+
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "index.html"), "w") as file:
+        file.write(INDEX_HTML)
+
+    # Search results (paginated by the server) and details of each listing
+    save_fixture(folder, "/api/property_sales/", {"results": listings})
+    for listing in listings:
+        save_fixture(folder, f"/api/property_sales/{listing['account_nbr']}/", listing)
@@ -0,0 +1,185 @@
+""" Long lived chrome with remote debugging, to reuse the same warm browser
+(session, cookies and accepted terms) in many runs of the scraper
+
+Usage (from the project folder):
+    python -m libs.browser_daemon --port 9222 --headless
+"""
+
+import os
+import time
+import shutil
+import argparse
+import subprocess
+from urllib.request import urlopen
+
+
+# Paths
+current_path = os.path.dirname(os.path.abspath(__file__))
+profile_path = os.path.join(current_path, "chrome_profile")
+
+# Chrome executables to search (if CHROME_PATH is not set)
+CHROME_NAMES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "chrome",
+]
+CHROME_WINDOWS_PATH = "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe"
+
+# Same flags used by WebScraping in new browsers
+CHROME_ARGS = [
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--start-maximized",
+    "--disable-notifications",
+    "--disable-infobars",
+    "--disable-dev-shm-usage",
+    "--disable-renderer-backgrounding",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-client-side-phishing-detection",
+    "--disable-crash-reporter",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-blink-features=AutomationControlled",
+    "--mute-audio",
+]
+
+
+def get_chrome_path() -> str:
+    """ Return the path of the chrome executable
+
+    Returns:
+        str: path of chrome (empty if not found)
+    """
+
+    chrome_path = os.getenv("CHROME_PATH", "")
+    if chrome_path:
+        return chrome_path
+
+    for chrome_name in CHROME_NAMES:
+        chrome_path = shutil.which(chrome_name)
+        if chrome_path:
+            return chrome_path
+
+    if os.name == "nt" and os.path.isfile(CHROME_WINDOWS_PATH):
+        return CHROME_WINDOWS_PATH
+
+    return ""
+
+
+def get_worker_address(debugger_address: str, worker: int) -> str:
+    """ Return the debugger address of a worker browser (one port by worker)
+
+    Args:
+        debugger_address (str): address of the first browser (host:port)
+        worker (int): id of the worker, from 0
+
+    Returns:
+        str: address of the worker browser
+    """
+
+    host, port = debugger_address.rsplit(":", 1)
+    return f"{host}:{int(port) + worker}"
+
+
+def is_browser_running(debugger_address: str) -> bool:
+    """ Validate if a browser is listening in the debugger address
+
+    Args:
+        debugger_address (str): address of the browser (host:port)
+
+    Returns:
+        bool: True if the browser answers the devtools version request
+    """
+
+    try:
+        with urlopen(f"http://{debugger_address}/json/version", timeout=2):
+            return True
+    except OSError:
+        return False
+
+
+def launch_browser(debugger_address: str, headless: bool = False,
+                   user_data_dir: str = "", time_out: int = 30) -> subprocess.Popen:
+    """ Start chrome with remote debugging, in background (the browser keeps
+    running when this process ends)
+
+    Args:
+        debugger_address (str): address to listen (host:port)
+        headless (bool): run chrome in headless mode
+        user_data_dir (str): chrome profile folder (default one by port
+            inside libs/chrome_profile)
+        time_out (int): max seconds to wait for the browser
+
+    Returns:
+        subprocess.Popen: chrome process
+    """
+
+    chrome_path = get_chrome_path()
+    if not chrome_path:
+        raise FileNotFoundError("Chrome not found. Set its path in CHROME_PATH")
+
+    host, port = debugger_address.rsplit(":", 1)
+    if not user_data_dir:
+        user_data_dir = os.path.join(profile_path, port)
+    os.makedirs(user_data_dir, exist_ok=True)
+
+    command = [
+        chrome_path,
+        f"--remote-debugging-address={host}",
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={user_data_dir}",
+    ] + CHROME_ARGS
+    if headless:
+        command.append("--headless=new")
+
+    print(f"Starting chrome in {debugger_address}...")
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+    # Wait until the devtools server is ready
+    start = time.monotonic()
+    while time.monotonic() - start < time_out:
+        if is_browser_running(debugger_address):
+            return process
+        if process.poll() is not None:
+            break
+        time.sleep(0.5)
+
+    raise RuntimeError(f"Chrome not started in {debugger_address}")
+
+
+def ensure_browser(debugger_address: str, headless: bool = False):
+    """ Start the browser if it is not running yet
+
+    Args:
+        debugger_address (str): address of the browser (host:port)
+        headless (bool): run chrome in headless mode (new browser only)
+    """
+
+    if not is_browser_running(debugger_address):
+        launch_browser(debugger_address, headless)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Chrome with remote debugging")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9222)
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--user-data-dir", default="")
+    args = parser.parse_args()
+
+    address = f"{args.host}:{args.port}"
+    if is_browser_running(address):
+        print(f"Chrome already running in {address}")
+    else:
+        chrome_process = launch_browser(address, args.headless, args.user_data_dir)
+        print(f"Chrome running in {address} (pid {chrome_process.pid}). "
+              "Set BROWSER_DEBUGGER_ADDRESS to use it.")
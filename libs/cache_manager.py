@@ -0,0 +1,113 @@
+import json
+
+
+class CacheManager():
+    """ Save in a local json file the last page scraped (main checkpoint and
+    one checkpoint by worker) to resume the scraping
+    """
+
+    def __init__(self, cache_path: str):
+        """ Construtor of the class
+
+        Args:
+            cache_path (str): path to the cache file
+        """
+
+        self.cache_path = cache_path
+
+    def __create_cache_file__(self):
+        """ Create cache file with default data """
+
+        data = {
+            "last_page": "",
+            "last_page_num": 1,
+            "finished": False,
+            "workers_num": 1,
+            "workers": {}
+        }
+        
+        with open(self.cache_path, "w") as file:
+            json.dump(data, file, indent=4)
+
+    def update_page_cache(self, page_link: str, page_num: int, finished: bool,
+                          worker: int = None):
+        """ Save in local json file the last page link and
+        if it have finished the scraping
+
+        Args:
+            page_link (str): last page link
+            page_num (int): last page number
+            finished (bool): if the scraping have finished
+            worker (int): id of the worker to save its own checkpoint
+                (None to save the main checkpoint)
+        """
+
+        # Update data
+        current_cache = self.get_cache()
+        checkpoint = current_cache
+        if worker is not None:
+            workers_cache = current_cache.setdefault("workers", {})
+            checkpoint = workers_cache.setdefault(str(worker), {})
+        checkpoint["last_page"] = page_link
+        checkpoint["last_page_num"] = page_num
+        checkpoint["finished"] = finished
+
+        # Write data
+        with open(self.cache_path, "w") as file:
+            json.dump(current_cache, file, indent=4)
+
+    def reset_workers_cache(self, workers_num: int):
+        """ Remove the workers checkpoints if they were saved with
+        a different number of workers (the pages of each worker changed)
+
+        Args:
+            workers_num (int): number of workers of the current run
+        """
+
+        current_cache = self.get_cache()
+        if current_cache.get("workers_num") == workers_num:
+            return
+
+        current_cache["workers_num"] = workers_num
+        current_cache["workers"] = {}
+        with open(self.cache_path, "w") as file:
+            json.dump(current_cache, file, indent=4)
+
+    def get_worker_cache(self, worker: int) -> dict:
+        """ Get the checkpoint of a worker
+
+        Args:
+            worker (int): id of the worker
+
+        Returns:
+            dict: worker cache data (same keys as the main checkpoint)
+        """
+
+        workers_cache = self.get_cache().get("workers", {})
+        return workers_cache.get(str(worker), {
+            "last_page": "",
+            "last_page_num": 1,
+            "finished": False
+        })
+
+    def get_cache(self) -> dict:
+        """ Get the cache data
+
+        Returns:
+            dict: cache data
+        """
+        
+        try:
+            with open(self.cache_path, "r") as file:
+                cache_data = json.load(file)
+        except Exception:
+            cache_data = {}
+        
+        # Create file if not exists
+        if not cache_data:
+            self.__create_cache_file__()
+
+            with open(self.cache_path, "r") as file:
+                cache_data = json.load(file)
+                
+        return cache_data
\ No newline at end of file
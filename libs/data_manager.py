@@ -1,40 +1,219 @@
 import os
-import json
-from libs.google_sheets import SheetsManager
+import time
+from libs.google_sheets import SheetsManager, QuotaBudget
+from libs.property_data import (
+    OUTPUT_FIELDS,
+    HEADER_FIELDS,
+    PropertyRecord,
+    get_account_key,
+    get_row_hash,
+)
+from libs.timing import traced
+from libs.local_store import LocalStore
+
+
+class BatchWriter():
+    """ Buffer of rows waiting to be written in a sheet with a single request """
+
+    def __init__(self, max_rows: int = 50, max_seconds: int = 30):
+        """ Construtor of the class
+
+        Args:
+            max_rows (int): rows to buffer before flush
+            max_seconds (int): max seconds to keep rows in the buffer
+        """
+
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+
+        # Pending data (sheet row number: values)
+        # and single cells (sheet row number: {column number: value})
+        self.rows = {}
+        self.cells = {}
+        self.accounts = {}
+        self.inserts = set()
+        self.highlights = set()
+        self.last_flush = time.monotonic()
+
+    def add_row(self, row: int, values: list, highlight: bool = False,
+                account_number: str = "", insert: bool = False):
+        """ Save a row to write in the next flush (replace previous values)
+
+        Args:
+            row (int): sheet row number
+            values (list): values of the row
+            highlight (bool): highlight the row after write it
+            account_number (str): account number of the row
+            insert (bool): if the row is new (expected empty in the sheet)
+        """
+
+        self.rows[row] = values
+        self.accounts[row] = account_number
+        if insert:
+            self.inserts.add(row)
+        if highlight:
+            self.highlights.add(row)
+        else:
+            self.highlights.discard(row)
+
+    def add_cell(self, row: int, column: int, value, account_number: str = ""):
+        """ Save a single cell to write in the next flush (if the row is
+        pending, the value is replaced in the row)
+
+        Args:
+            row (int): sheet row number
+            column (int): sheet column number
+            value (any): value of the cell
+            account_number (str): account number of the row
+        """
+
+        if row in self.rows:
+            self.rows[row][column - 1] = value
+            return
+
+        self.cells.setdefault(row, {})[column] = value
+        self.accounts[row] = account_number
+
+    def is_due(self) -> bool:
+        """ Validate if the buffer is full or too old
+
+        Returns:
+            bool: True if the buffer should be flushed
+        """
+
+        pending = len(self.rows) + len(self.cells)
+        if not pending:
+            return False
+
+        elapsed = time.monotonic() - self.last_flush
+        return pending >= self.max_rows or elapsed >= self.max_seconds
+
+    def clear(self):
+        """ Remove all pending data """
+
+        self.rows = {}
+        self.cells = {}
+        self.accounts = {}
+        self.inserts = set()
+        self.highlights = set()
+        self.last_flush = time.monotonic()
 
 
 class DataManager(SheetsManager):
 
     def __init__(self, google_sheet_link: str, creds_path: os.path,
-                 cache_path: os.path, sheet_output: str = None, sheet_input: str = None):
+                 sheet_output: str = None, sheet_input: str = None,
+                 buffer_rows: int = 50, buffer_seconds: int = 30, client=None,
+                 quota_per_minute: int = 60, touch_unchanged: bool = True,
+                 store_path: str = "", refresh_store: bool = False,
+                 budget: QuotaBudget = None):
         """ Construtor of the class
 
         Args:
             google_sheet_link (str): google sheet link
             creds_path (os.path): path to the credentials file
-            cache_path (os.path): path to the cache file
             sheet_name (str): name of the sheet
+            buffer_rows (int): rows to write in the output sheet in each request
+            buffer_seconds (int): max seconds to keep rows before write them
+            client (gspread.Client): client to use instead of the credentials
+            quota_per_minute (int): max read and max write requests by minute
+            touch_unchanged (bool): update the "Date Pulled" of the
+                properties without changes (else they are not written)
+            store_path (str): path of the local database with the output
+                rows (optional, see LocalStore)
+            refresh_store (bool): load the output rows from the sheet
+                instead of the local database
+            budget (QuotaBudget): quota budget shared with other data
+                managers (optional)
         """
 
-        super().__init__(google_sheet_link, creds_path, sheet_output)
+        super().__init__(google_sheet_link, creds_path, sheet_output, client,
+                         quota_per_minute, budget=budget)
         
         # Save sheets names
         self.sheet_input = sheet_input
         self.sheet_output = sheet_output
+        
+        # Rows waiting to be written in the output sheet
+        self.writer = BatchWriter(buffer_rows, buffer_seconds)
 
-        # Get all data from google sheet
+        # Get all data from google sheet (a PropertyRecord by row)
         self.data = {
             sheet_input: [],
             sheet_output: []
         }
-        self.__update_sheet_data__(self.sheet_output)
+        
+        # Account numbers index (account key: (data position, sheet row))
+        # and next empty row of each sheet
+        self.index = {
+            sheet_input: {},
+            sheet_output: {}
+        }
+        self.next_row = {
+            sheet_input: 2,
+            sheet_output: 2
+        }
+        
+        # Hash of the meaningful values of each output row
+        # (account key: hash) to skip properties without changes
+        self.row_hashes = {}
+        self.touch_unchanged = touch_unchanged
+        self.rows_stats = {"new": 0, "updated": 0, "unchanged": 0}
+        
+        # Rows of the output sheet highlighted with address_error
+        self.highlighted = set()
+        self.highlight_color = (244 / 255, 204 / 255, 204 / 255)
+        self.clear_color = None  # remove the fill
+        
+        # Local copy of the output sheet: when it has data (and its rows
+        # match the sheet), the output sheet is not read, and rows not
+        # written in the last run are written again in the next flush
+        self.store = LocalStore(store_path) if store_path else None
+        dirty_rows = []
+        if self.store:
+            dirty_rows = self.store.get_dirty_rows()
+        use_store = self.store and not refresh_store and not self.store.is_empty()
+        if use_store and self.__is_store_synced__():
+            self.__load_store_data__()
+        else:
+            self.__update_sheet_data__(self.sheet_output)
         self.__update_sheet_data__(self.sheet_input)
+        self.__resync_rows__(dirty_rows)
 
-        # Save cache file
-        self.cache_path = cache_path
+    def __validate_headers__(self, sheet_name: str, headers: list):
+        """ Validate the columns read by title (see HEADER_FIELDS) of a
+        sheet, and warn if they are not in the position used to write the
+        rows (empty sheets are not validated)
+        
+        Args:
+            sheet_name (str): name of the sheet
+            headers (list): columns titles of the sheet
+        """
+        
+        titles = [str(title).strip() for title in headers]
+        if not any(titles):
+            return
+        
+        # The input sheet only needs the account number
+        required_titles = list(HEADER_FIELDS)
+        if sheet_name != self.sheet_output:
+            required_titles = ["Account Number"]
+        
+        for title in required_titles:
+            if title not in titles:
+                raise ValueError(
+                    f"Column '{title}' not found in sheet '{sheet_name}'"
+                )
+            
+            column = OUTPUT_FIELDS.index(HEADER_FIELDS[title])
+            if sheet_name == self.sheet_output and titles.index(title) != column:
+                print(f"Warning: Column '{title}' of sheet '{sheet_name}' "
+                      f"is not the column {column + 1}, where it is written.")
 
     def __update_sheet_data__(self, sheet_name: str):
         """ Save in instance all data from the google sheet with empty rows removed
+        (the output sheet must have the columns of HEADER_FIELDS and the input
+        sheet at least the "Account Number" column, see __validate_headers__)
         
         Args:
             sheet_name (str): name of the sheet
@@ -43,58 +222,211 @@ class DataManager(SheetsManager):
         # Change to the correct sheet
         self.set_sheet(sheet_name)
 
-        # Clean empty rows
-        data = self.get_data()
-        data = list(filter(lambda row: row["Property Street"], data))
+        records = self.get_data()
+        if records:
+            headers = list(records[0].keys())
+        else:
+            headers = self.get_row_values(1)
+        self.__validate_headers__(sheet_name, headers)
+        
+        # Clean empty rows (the input sheet only needs the account number)
+        key_column = "Property Street"
+        if sheet_name != self.sheet_output:
+            key_column = "Account Number"
+        
+        # Index rows by account number (first row found of each account)
+        # and save rows with address_error
+        data = []
+        index = {}
+        row_hashes = {}
+        highlighted = set()
+        for row_num, row in enumerate(records, start=2):
+            if not row.get(key_column):
+                continue
+            account_key = self.__get_account_key__(row["Account Number"])
+            record = PropertyRecord.from_record(row)
+            if account_key not in index:
+                index[account_key] = (len(data), row_num)
+                row_hashes[account_key] = get_row_hash(record.to_row())
+            data.append(record)
+            
+            if record.address_error:
+                highlighted.add(row_num)
+                    
+        if sheet_name == self.sheet_output:
+            self.highlighted = highlighted
+            self.row_hashes = row_hashes
+            
+            # Replace the local copy with the sheet rows
+            if self.store:
+                store_rows = []
+                for account_key, (position, row_num) in index.items():
+                    record = data[position]
+                    store_rows.append({
+                        "account_key": account_key,
+                        "account_number": record.account_number,
+                        "row_num": row_num,
+                        "values": record.to_row(),
+                        "status": record.status,
+                        "address_error": row_num in highlighted,
+                    })
+                self.store.replace_all(headers, store_rows, len(records) + 2)
         
         # Save data
         self.data[sheet_name] = data
-
-    def __create_cache_file__(self):
-        """ Create cache file with default data """
-
-        data = {
-            "last_page": "",
-            "last_page_num": 1,
-            "finished": False
+        self.index[sheet_name] = index
+        self.next_row[sheet_name] = len(records) + 2
+        
+    def __is_store_synced__(self) -> bool:
+        """ Validate that the rows of the local database are still in the
+        same rows of the output sheet (not sorted, deleted or added by hand),
+        reading only the account numbers column
+        
+        Returns:
+            bool: True if the local database can replace the sheet data
+        """
+        
+        self.set_sheet(self.sheet_output)
+        account_column = OUTPUT_FIELDS.index("account_number") + 1
+        sheet_accounts = self.get_col_values(account_column)[1:]
+        sheet_keys = {
+            row_num: self.__get_account_key__(account_number)
+            for row_num, account_number in enumerate(sheet_accounts, start=2)
+            if str(account_number).strip()
         }
         
-        with open(self.cache_path, "w") as file:
-            json.dump(data, file, indent=4)
+        # Rows not written in the last run can be missing in the sheet
+        store_keys = {}
+        for row in self.store.get_rows():
+            sheet_key = sheet_keys.get(row["row_num"])
+            if row["dirty"] and sheet_key is None:
+                continue
+            if sheet_key != row["account_key"]:
+                print("Output sheet changed outside the scraper (account "
+                      f"{row['account_number']} not found in row "
+                      f"{row['row_num']}), reading the sheet...")
+                return False
+            store_keys[row["row_num"]] = row["account_key"]
+        
+        # Rows added to the sheet by hand
+        new_rows = set(sheet_keys) - set(store_keys)
+        next_row = self.store.get_meta("next_row", 2)
+        if any(row_num >= next_row for row_num in new_rows):
+            print("Output sheet has rows not found in the local database, "
+                  "reading the sheet...")
+            return False
+        
+        return True
+        
+    def __load_store_data__(self):
+        """ Save in instance the output sheet data from the local database
+        (without read the sheet)
+        """
+        
+        print("Loading output data from the local database...")
+        
+        data = []
+        index = {}
+        row_hashes = {}
+        highlighted = set()
+        for row in self.store.get_rows():
+            index[row["account_key"]] = (len(data), row["row_num"])
+            row_hashes[row["account_key"]] = get_row_hash(row["values"])
+            data.append(PropertyRecord.from_row(row["values"]))
+            if row["synced_error"]:
+                highlighted.add(row["row_num"])
+        
+        self.data[self.sheet_output] = data
+        self.index[self.sheet_output] = index
+        self.next_row[self.sheet_output] = self.store.get_meta("next_row", 2)
+        self.row_hashes = row_hashes
+        self.highlighted = highlighted
+        
+    def __resync_rows__(self, rows: list):
+        """ Save again in the writer the rows of the local database not
+        written in the sheet (like the last rows of a failed run)
+        
+        Args:
+            rows (list): rows of the local database (see LocalStore.get_rows)
+        """
+        
+        if not rows:
+            return
+        
+        print(f"Writing {len(rows)} rows pending from the last run...")
+        for row in rows:
+            found = self.get_account_number_position(row["account_number"])
+            if found:
+                self.writer.add_row(found[1], row["values"], row["address_error"],
+                                    row["account_number"], row["is_new"])
+            else:
+                self.__save_row__(row["account_number"], row["values"],
+                                  row["address_error"], True)
+        self.flush()
+        
+    def __get_account_key__(self, account_number) -> str:
+        """ Normalize an account number to find it in the index
+        (sheets save numeric accounts as numbers, without left zeros)
+        
+        Args:
+            account_number (str or int): account number
             
-    def __heightlight__(self, range: str):
-        """ Highlight a range in red color
+        Returns:
+            str: account key
+        """
+        
+        return get_account_key(account_number)
+
+    def get_input_accounts(self) -> set:
+        """ Return the accounts of the input sheet, to skip them before
+        scraping their details
         
+        Returns:
+            set: account keys (see get_account_key)
+        """
+        
+        return set(self.index[self.sheet_input])
+
+    def get_account_number_position(self, account_number: str,
+                                    sheet_name: str = "") -> tuple:
+        """ Get the position of an account number in the local data and sheet
+
         Args:
-            range (str): range to highlight
+            account_number (str): account number
+            sheet_name (str): name of the sheet (default output sheet)
+
+        Returns:
+            tuple: data position and sheet row number (None if not found)
         """
         
-        color = (244 / 255, 204 / 255, 204 / 255)
-        self.set_bg_color(range, color)
-        print(f"\tHightlighted range: {range}")
+        if not sheet_name:
+            sheet_name = self.sheet_output
+            
+        account_key = self.__get_account_key__(account_number)
+        return self.index[sheet_name].get(account_key)
 
-    def get_account_number_row(self, account_number: str, sheet_name: str = "") -> dict:
+    @traced("get_account_number_row")
+    def get_account_number_row(self, account_number: str,
+                               sheet_name: str = "") -> PropertyRecord:
         """ Get the row of a case number
 
         Args:
             account_number (str): case number
+            sheet_name (str): name of the sheet (default output sheet)
 
         Returns:
-            dict: row of the case number
+            PropertyRecord: row of the case number (None if not found)
         """
         
         if not sheet_name:
             sheet_name = self.sheet_output
 
         # Get the case row
-        account_number_row = list(filter(
-            lambda row: str(row["Account Number"]) in str(account_number),
-            self.data[sheet_name]
-        ))
-        if account_number_row:
-            return account_number_row[0]
+        position = self.get_account_number_position(account_number, sheet_name)
+        if position:
+            return self.data[sheet_name][position[0]]
         else:
-            return {}
+            return None
 
     def get_case_status(self, account_number: str) -> str:
         """ Get the status of a case
@@ -109,95 +441,284 @@ class DataManager(SheetsManager):
         # Get the case status
         case_status_row = self.get_account_number_row(account_number)
         if case_status_row:
-            return case_status_row["Status"]
+            return case_status_row.status
         else:
             return ""
 
-    def insert_property(self, data: dict):
+    def __save_row__(self, account_number: str, values: list,
+                     highlight: bool, insert: bool):
+        """ Save a row in local data and in the writer buffer
+        
+        Args:
+            account_number (str): account number of the row
+            values (list): values of the row
+            highlight (bool): highlight the row after write it
+            insert (bool): add the row in the bottom of the sheet
+                (else replace the row of the account number)
+        """
+        
+        data = self.data[self.sheet_output]
+        account_key = self.__get_account_key__(account_number)
+        self.row_hashes[account_key] = get_row_hash(values)
+        
+        if insert:
+            row_num = self.next_row[self.sheet_output]
+            self.index[self.sheet_output][account_key] = (len(data), row_num)
+            self.next_row[self.sheet_output] += 1
+            data.append(PropertyRecord.from_row(values))
+        else:
+            position, row_num = self.get_account_number_position(account_number)
+            data[position] = PropertyRecord.from_row(values)
+        
+        # Save the row in the local database until it is written
+        if self.store:
+            self.store.save_row(account_key, account_number, row_num, values,
+                                values[OUTPUT_FIELDS.index("status")],
+                                highlight, insert)
+            if insert:
+                self.store.set_meta("next_row", self.next_row[self.sheet_output])
+        
+        self.writer.add_row(row_num, values, highlight, account_number, insert)
+
+    @traced("insert_property")
+    def insert_property(self, data: PropertyRecord):
         """ Insert a property data in the google sheet
+        (buffered, see flush)
 
         Args:
-            data (dict): property scraped data
+            data (PropertyRecord): property scraped data
         """
-        
-        # Set the correct sheet and update data
-        self.set_sheet(self.sheet_output)
-        self.__update_sheet_data__(self.sheet_output)
 
         # Insert data in the bottom of the google sheet
-        last_row = len(self.data[self.sheet_output])
-        data_row = list(data.values())
+        data_row = data.to_row()
         data_row_str = list(map(str, data_row))
-        self.write_data([data_row_str], last_row + 2)
+        self.__save_row__(data.account_number, data_row_str,
+                          data.address_error, True)
         
-        # Hightlight the row in red if there is an address_error
-        if data["address_error"]:
-            range = self.get_range(last_row + 2, 1, len(data_row))
-            self.__heightlight__(range)
+        if self.writer.is_due():
+            self.flush()
 
-    def update_property(self, data):
+    @traced("update_property")
+    def update_property(self, data: PropertyRecord):
         """ Update a property data in the google sheet
+        (buffered, see flush)
 
         Args:
-            data (dict): property scraped data
+            data (PropertyRecord): property scraped data
         """
-        
-        # Set the correct sheet and update data
-        self.set_sheet(self.sheet_output)
-        self.__update_sheet_data__(self.sheet_output)
-
-        # Get row index of the case number
-        account_number = data["account_number"]
-        account_number_row = self.get_account_number_row(account_number)
-        row_index = self.data[self.sheet_output].index(account_number_row)
 
         # Replace the row with the new data
-        data_row = list(data.values())
-        self.write_data([data_row], row_index + 2)
+        data_row = data.to_row()
+        self.__save_row__(data.account_number, data_row,
+                          data.address_error, False)
         
-        # Hightlight the row in red if there is an address_error
-        if data["address_error"]:
-            range = self.get_range(row_index + 2, 1, len(data_row))
-            self.__heightlight__(range)
+        if self.writer.is_due():
+            self.flush()
 
-    def update_page_cache(self, page_link: str, page_num: int, finished: bool):
-        """ Save in local json file the last page link and
-        if it have finished the scraping
+    def is_property_unchanged(self, data: PropertyRecord) -> bool:
+        """ Validate if the meaningful values of a property are the same
+        of its row in the output sheet
 
         Args:
-            page_link (str): last page link
-            page_num (int): last page number
-            finished (bool): if the scraping have finished
+            data (PropertyRecord): property scraped data
+
+        Returns:
+            bool: True if the property is saved without changes
         """
 
-        # Update data
-        current_cache = self.get_cache()
-        current_cache["last_page"] = page_link
-        current_cache["last_page_num"] = page_num
-        current_cache["finished"] = finished
+        account_key = self.__get_account_key__(data.account_number)
+        saved_hash = self.row_hashes.get(account_key)
+        return saved_hash == get_row_hash(data.to_row())
 
-        # Write data
-        with open(self.cache_path, "w") as file:
-            json.dump(current_cache, file, indent=4)
+    @traced("touch_property")
+    def touch_property(self, data: PropertyRecord):
+        """ Update only the "Date Pulled" of a property in the google sheet
+        (buffered, see flush)
 
-    def get_cache(self) -> dict:
-        """ Get the cache data
+        Args:
+            data (PropertyRecord): property scraped data
+        """
 
+        column = OUTPUT_FIELDS.index("date_pulled") + 1
+        self.__save_cell__(data.account_number, column, data.date_pulled)
+
+        if self.writer.is_due():
+            self.flush()
+
+    def __save_cell__(self, account_number: str, column: int, value):
+        """ Save a cell of an output row in local data and in the writer
+        buffer
+
+        Args:
+            account_number (str): account number of the row
+            column (int): sheet column number
+            value (any): value of the cell
+        """
+
+        position, row_num = self.get_account_number_position(account_number)
+        row = self.data[self.sheet_output][position]
+        setattr(row, OUTPUT_FIELDS[column - 1], value)
+        self.writer.add_cell(row_num, column, value, account_number)
+
+        # Save the row in the local database until it is written
+        if self.store:
+            values = row.to_row()
+            highlight = row_num in self.writer.highlights \
+                or (row_num not in self.writer.rows and row_num in self.highlighted)
+            account_key = self.__get_account_key__(account_number)
+            self.store.save_row(account_key, account_number, row_num, values,
+                                row.status, highlight, False)
+            
+    def __has_conflicts__(self) -> bool:
+        """ Validate if the pending rows are still in the rows of the sheet
+        (other user or process wrote, sorted or deleted rows in the sheet
+        after the last load), reading only the account numbers column
+        
         Returns:
-            dict: cache data
+            bool: True if any row to insert is not empty, or any row to
+                update has other account number
+        """
+        
+        rows = set(self.writer.rows) | set(self.writer.cells)
+        if not rows:
+            return False
+        
+        first_row = min(rows)
+        last_row = max(rows)
+        account_column = OUTPUT_FIELDS.index("account_number") + 1
+        cell_range = self.get_column_range(account_column, first_row, last_row)
+        values = self.get_values(cell_range)
+        
+        for row in rows:
+            position = row - first_row
+            cells = values[position] if position < len(values) else []
+            sheet_account = str(cells[0]).strip() if cells else ""
+            if row in self.writer.inserts:
+                if sheet_account:
+                    return True
+            elif self.__get_account_key__(sheet_account) \
+                    != self.__get_account_key__(self.writer.accounts[row]):
+                return True
+        return False
+    
+    def __resolve_conflicts__(self):
+        """ Reload the output sheet and save again the pending rows
+        in their current positions (accounts not found are inserted)
         """
         
-        try:
-            with open(self.cache_path, "r") as file:
-                cache_data = json.load(file)
-        except Exception:
-            cache_data = {}
+        print("\tOutput sheet changed by another user. Reloading data...")
         
-        # Create file if not exists
-        if not cache_data:
-            self.__create_cache_file__()
+        pending_rows = []
+        for row, values in self.writer.rows.items():
+            pending_rows.append((
+                self.writer.accounts[row],
+                values,
+                row in self.writer.highlights,
+            ))
+        pending_cells = []
+        for row, cells in self.writer.cells.items():
+            pending_cells.append((self.writer.accounts[row], cells))
+        
+        self.__update_sheet_data__(self.sheet_output)
+        self.writer.clear()
+        for account_number, values, highlight in pending_rows:
+            found = self.get_account_number_position(account_number)
+            self.__save_row__(account_number, values, highlight, not found)
+        
+        # Cells of rows removed by the other user are discarded
+        for account_number, cells in pending_cells:
+            if not self.get_account_number_position(account_number):
+                continue
+            for column, value in cells.items():
+                self.__save_cell__(account_number, column, value)
+
+    @traced("flush")
+    def flush(self):
+        """ Write all pending rows and cells in the output sheet with a single
+        request, and highlight the rows with address_error (and clear
+        the rows fixed) with another single request
+        """
+        
+        if not self.writer.rows and not self.writer.cells:
+            return
+        
+        print(f"\tWriting {len(self.writer.rows)} rows and "
+              f"{len(self.writer.cells)} dates in the output sheet...")
+        
+        # Set the correct sheet and validate the rows to insert are empty
+        self.set_sheet(self.sheet_output)
+        if self.__has_conflicts__():
+            self.__resolve_conflicts__()
+        
+        # Write all rows
+        ranges_data = {}
+        for row, values in self.writer.rows.items():
+            cell_range = self.get_range(row, 1, len(values))
+            ranges_data[cell_range] = [values]
+        for row, cells in self.writer.cells.items():
+            for column, value in cells.items():
+                cell_range = self.get_range(row, column, column)
+                ranges_data[cell_range] = [[value]]
+        self.write_batch(ranges_data)
+        
+        # Hightlight the rows in red if there is an address_error
+        # and remove the color of the rows without error now
+        ranges_colors = {}
+        for row, values in self.writer.rows.items():
+            cell_range = self.get_range(row, 1, len(values))
+            if row in self.writer.highlights:
+                ranges_colors[cell_range] = self.highlight_color
+                self.highlighted.add(row)
+            elif row in self.highlighted:
+                ranges_colors[cell_range] = self.clear_color
+                self.highlighted.discard(row)
+        if ranges_colors:
+            print(f"\tUpdating color of {len(ranges_colors)} rows...")
+        self.set_bg_colors(ranges_colors)
+        
+        # Mark the rows as written in the local database
+        if self.store:
+            self.store.mark_synced([
+                self.__get_account_key__(account_number)
+                for account_number in self.writer.accounts.values()
+            ])
+        
+        self.writer.clear()
+
+    def save_property(self, data: PropertyRecord, skip_input: bool = False):
+        """ Insert or update a property in the output sheet
 
-            with open(self.cache_path, "r") as file:
-                cache_data = json.load(file)
-                
-        return cache_data
\ No newline at end of file
+        Args:
+            data (PropertyRecord): property scraped data
+            skip_input (bool): skip properties found in the input sheet
+        """
+
+        # Skip property if found in input sheet
+        account_number = data.account_number
+        print(f"\t\tAccount number: {account_number}")
+        account_row_input = self.get_account_number_row(
+            account_number,
+            self.sheet_input
+        )
+        if account_row_input and skip_input:
+            print("\t\tProperty found in input sheet. Skipping...")
+            return
+
+        # Validate new case status
+        old_status = self.get_case_status(account_number)
+
+        # Update or insert data (properties without changes are skipped
+        # or only its date is updated)
+        if old_status and self.is_property_unchanged(data):
+            print("\t\tProperty without changes.")
+            self.rows_stats["unchanged"] += 1
+            if self.touch_unchanged:
+                self.touch_property(data)
+        elif old_status:
+            print("\t\tUpdating property...")
+            self.rows_stats["updated"] += 1
+            self.update_property(data)
+        else:
+            print("\t\tInserting property...")
+            self.rows_stats["new"] += 1
+            self.insert_property(data)
@@ -0,0 +1,195 @@
+import os
+import csv
+import json
+from datetime import datetime
+
+from libs.property_data import OUTPUT_FIELDS, PropertyRecord
+from libs.data_manager import DataManager
+
+# Optional dependency (only required by ParquetSink)
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+
+
+class RecordSink():
+    """ Destination of the scraped properties (see get_property_data).
+    Records are written one at time and saved at the end of each page
+    """
+
+    def write(self, record: PropertyRecord):
+        """ Save a property record
+
+        Args:
+            record (PropertyRecord): property data (see build_property_data)
+        """
+
+        raise NotImplementedError
+
+    def page_done(self):
+        """ Save in disk (or in the sheets) all records of the page """
+
+    def close(self):
+        """ Save pending records and release the resources """
+
+        self.page_done()
+
+
+class FileSink(RecordSink):
+    """ Base of the sinks that append text lines to a local file """
+
+    def __init__(self, file_path: str):
+        """ Construtor of the class
+
+        Args:
+            file_path (str): path of the output file (appended if exists)
+        """
+
+        self.file_path = file_path
+        self.is_new_file = not os.path.isfile(file_path) \
+            or os.path.getsize(file_path) == 0
+        self.file = open(file_path, "a", newline="", encoding="utf-8")
+
+    def page_done(self):
+        """ Flush the file and save it in disk (fsync) """
+
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """ Save the file and close it """
+
+        if self.file.closed:
+            return
+        self.page_done()
+        self.file.close()
+
+
+class CsvSink(FileSink):
+    """ Save records as csv rows, with the OUTPUT_FIELDS as header """
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+
+        self.writer = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS,
+                                     extrasaction="ignore")
+        if self.is_new_file:
+            self.writer.writeheader()
+
+    def write(self, record: PropertyRecord):
+        self.writer.writerow(record.to_dict())
+
+
+class JsonlSink(FileSink):
+    """ Save records as json lines """
+
+    def write(self, record: PropertyRecord):
+        self.file.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+
+
+class ParquetSink(RecordSink):
+    """ Save records in a parquet file, with a row group by page
+    (require pyarrow)
+    """
+
+    def __init__(self, file_path: str):
+        """ Construtor of the class
+
+        Args:
+            file_path (str): path of the output file (parquet files can not
+                be appended: a new file with the date is created if exists)
+        """
+
+        if pyarrow is None:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        if os.path.isfile(file_path):
+            base_path, extension = os.path.splitext(file_path)
+            date = datetime.now().strftime("%Y%m%d%H%M%S")
+            file_path = f"{base_path}-{date}{extension}"
+            print(f"Parquet file already exists. Saving in '{file_path}'...")
+
+        self.file_path = file_path
+        self.schema = pyarrow.schema([
+            (field, pyarrow.bool_() if field == "address_error" else pyarrow.string())
+            for field in OUTPUT_FIELDS
+        ])
+        self.file = open(file_path, "wb")
+        self.writer = parquet.ParquetWriter(self.file, self.schema)
+        self.records = []
+
+    def write(self, record: PropertyRecord):
+        row = record.to_dict()
+        for field, value in row.items():
+            if field != "address_error" and value is not None:
+                row[field] = str(value)
+        self.records.append(row)
+
+    def page_done(self):
+        """ Write the records of the page as a row group and save the file """
+
+        if not self.records:
+            return
+
+        table = pyarrow.Table.from_pylist(self.records, schema=self.schema)
+        self.writer.write_table(table)
+        self.records = []
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """ Write pending records and the parquet footer """
+
+        if self.file.closed:
+            return
+        self.page_done()
+        self.writer.close()
+        self.file.close()
+
+
+class SheetsSink(RecordSink):
+    """ Save records in the output google sheet (see DataManager) """
+
+    def __init__(self, data_manager: DataManager, skip_input: bool = False):
+        """ Construtor of the class
+
+        Args:
+            data_manager (DataManager): data manager instance
+            skip_input (bool): skip properties found in the input sheet
+        """
+
+        self.data_manager = data_manager
+        self.skip_input = skip_input
+
+    def write(self, record: PropertyRecord):
+        self.data_manager.save_property(record, self.skip_input)
+
+    def page_done(self):
+        self.data_manager.flush()
+
+
+# Sinks by file extension
+FILE_SINKS = {
+    ".csv": CsvSink,
+    ".jsonl": JsonlSink,
+    ".parquet": ParquetSink,
+}
+
+
+def get_file_sink(file_path: str) -> RecordSink:
+    """ Create the sink of a file, by its extension
+
+    Args:
+        file_path (str): path of the output file (.csv, .jsonl or .parquet)
+
+    Returns:
+        RecordSink: sink instance
+    """
+
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in FILE_SINKS:
+        extensions = ", ".join(FILE_SINKS)
+        raise ValueError(f"Export format not supported: '{file_path}' ({extensions})")
+    return FILE_SINKS[extension](file_path)
@@ -1,35 +1,212 @@
 import os
-from time import sleep
+import time
+import random
+from collections import deque
 
 import gspread
+import requests
 from oauth2client.service_account import ServiceAccountCredentials
 from gspread_formatting import format_cell_range, Color, CellFormat
 
 
+# Http status of the api errors to retry (quota and server errors)
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class QuotaBudget ():
+    """ Local count of the api requests of the last minute (Google quotas
+    are by minute, for reads and writes), to wait before the api rejects them
+    """
+
+    def __init__(self, reads_per_minute: int = 60, writes_per_minute: int = 60):
+        """ Construtor of the class
+
+        Args:
+            reads_per_minute (int): max read requests by minute (0 to disable)
+            writes_per_minute (int): max write requests by minute (0 to disable)
+        """
+
+        self.window = 60
+        self.limits = {
+            "read": reads_per_minute,
+            "write": writes_per_minute,
+        }
+        self.requests = {
+            "read": deque(),
+            "write": deque(),
+        }
+
+    def __clean__(self, kind: str, now: float):
+        """ Remove the requests out of the current window """
+
+        timestamps = self.requests[kind]
+        while timestamps and now - timestamps[0] >= self.window:
+            timestamps.popleft()
+
+    def get_reset_seconds(self, kind: str) -> float:
+        """ Seconds until the oldest request of the window expires
+
+        Args:
+            kind (str): "read" or "write"
+
+        Returns:
+            float: seconds (0 if there are no requests in the window)
+        """
+
+        now = time.monotonic()
+        self.__clean__(kind, now)
+        timestamps = self.requests[kind]
+        if not timestamps:
+            return 0
+        return max(0, self.window - (now - timestamps[0]))
+
+    def acquire(self, kind: str) -> float:
+        """ Wait until a request is allowed by the budget and register it
+
+        Args:
+            kind (str): "read" or "write"
+
+        Returns:
+            float: seconds waited
+        """
+
+        limit = self.limits[kind]
+        if not limit:
+            return 0
+
+        waited = 0
+        while True:
+            self.__clean__(kind, time.monotonic())
+            if len(self.requests[kind]) < limit:
+                break
+            wait_time = self.get_reset_seconds(kind)
+            time.sleep(wait_time)
+            waited += wait_time
+
+        self.requests[kind].append(time.monotonic())
+        return waited
+
+
 class SheetsManager ():
     """ Class to conect to google shets and upload data"""
 
-    def __init__(self, google_sheet_link, creds_path, sheet_name=None):
-        """ Construtor of the class"""
+    def __init__(self, google_sheet_link, creds_path, sheet_name=None, client=None,
+                 quota_per_minute=60, max_retries=5, budget=None):
+        """ Construtor of the class
+
+        Args:
+            google_sheet_link (str): google sheet link
+            creds_path (str): path to the credentials file
+            sheet_name (str): name of the sheet (default first sheet)
+            client (gspread.Client): client to use instead of the credentials
+                (like the in memory client of the benchmarks)
+            quota_per_minute (int): max read and max write requests by minute
+                (0 to disable the local budget)
+            max_retries (int): retries of each request after quota
+                or server errors
+            budget (QuotaBudget): budget shared with other managers of the
+                same project (replace quota_per_minute)
+        """
+
+        # Retries with exponential backoff (seconds) and local quota budget
+        self.max_retries = max_retries
+        self.backoff_base = 1
+        self.backoff_max = 64
+        self.budget = budget or QuotaBudget(quota_per_minute, quota_per_minute)
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "backoff_seconds": 0,
+            "throttle_seconds": 0,
+        }
 
         # Read credentials
-        if not os.path.isfile(creds_path):
-            raise FileNotFoundError("The credential file path is not correct")
+        if not client:
+            if not os.path.isfile(creds_path):
+                raise FileNotFoundError("The credential file path is not correct")
 
-        scope = ['https://spreadsheets.google.com/feeds',
-                 'https://www.googleapis.com/auth/drive']
-        creds = ServiceAccountCredentials.from_json_keyfile_name(
-            creds_path, scope)
-        client = gspread.authorize(creds)
+            scope = ['https://spreadsheets.google.com/feeds',
+                     'https://www.googleapis.com/auth/drive']
+            creds = ServiceAccountCredentials.from_json_keyfile_name(
+                creds_path, scope)
+            client = gspread.authorize(creds)
 
         # Conect to google sheet
-        self.sheet = client.open_by_url(google_sheet_link)
+        self.sheet = self.__request__("read", client.open_by_url,
+                                      google_sheet_link)
 
-        # Set the sheet 1 as worksheet
+        # Set the sheet 1 as worksheet (worksheets are saved by name)
+        self.worksheets = {}
         if sheet_name:
-            self.worksheet = self.sheet.worksheet(sheet_name)
+            self.set_sheet(sheet_name)
         else:
-            self.worksheet = self.sheet.sheet1
+            self.worksheet = self.__request__("read", lambda: self.sheet.sheet1)
+
+    def __get_backoff__(self, attempt: int, status: int, kind: str) -> float:
+        """ Seconds to wait before retry a request: exponential backoff
+        with jitter, and at least until the quota window resets for 429 errors
+
+        Args:
+            attempt (int): number of the failed attempt (from 0)
+            status (int): http status of the error (0 for connection errors)
+            kind (str): "read" or "write"
+
+        Returns:
+            float: seconds to wait
+        """
+
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        backoff = random.uniform(backoff / 2, backoff)
+        if status == 429:
+            backoff = max(backoff, self.budget.get_reset_seconds(kind))
+        return backoff
+
+    def __request__(self, kind: str, function, *args, **kwargs):
+        """ Run an api request, waiting for the local quota budget and
+        retrying quota, server and connection errors
+
+        Args:
+            kind (str): "read" or "write"
+            function (callable): gspread function to call
+            *args, **kwargs: arguments of the function
+
+        Returns:
+            any: result of the function
+        """
+
+        for attempt in range(self.max_retries + 1):
+            self.stats["throttle_seconds"] += self.budget.acquire(kind)
+            self.stats["requests"] += 1
+            try:
+                return function(*args, **kwargs)
+            except gspread.exceptions.APIError as error:
+                status = error.response.status_code
+                if status not in RETRY_STATUS or attempt == self.max_retries:
+                    raise
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout):
+                status = 0
+                if attempt == self.max_retries:
+                    raise
+
+            backoff = self.__get_backoff__(attempt, status, kind)
+            print(f"\tSheets api error ({status or 'connection'}). "
+                  f"Retrying in {backoff:.1f} seconds...")
+            self.stats["retries"] += 1
+            self.stats["backoff_seconds"] += backoff
+            time.sleep(backoff)
+
+    def get_stats(self) -> dict:
+        """ Return the api requests counters
+
+        Returns:
+            dict: requests, retries, backoff_seconds and throttle_seconds
+        """
+
+        stats = dict(self.stats)
+        stats["backoff_seconds"] = round(stats["backoff_seconds"], 3)
+        stats["throttle_seconds"] = round(stats["throttle_seconds"], 3)
+        return stats
 
     def set_sheet(self, sheet_name: str):
         """ Change current working sheet
@@ -38,20 +215,16 @@ class SheetsManager ():
             sheet_name (str): sheet name
         """
 
-        self.worksheet = self.sheet.worksheet(sheet_name)
+        if sheet_name not in self.worksheets:
+            self.worksheets[sheet_name] = self.__request__(
+                "read", self.sheet.worksheet, sheet_name)
+        self.worksheet = self.worksheets[sheet_name]
 
     def write_cell(self, value, row=1, column=1):
         """ Write data in specific cell
         """
         
-        for _ in range(3):
-            try:
-                self.worksheet.update_cell(row, column, value)
-            except Exception:
-                print("\tError writing cell. Retrying in 1 minute seconds...")
-                sleep(60)
-            else:
-                break
+        self.__request__("write", self.worksheet.update_cell, row, column, value)
 
     def write_data(self, data, row=1, column=1):
         """ Write list of data in the worksheet"""
@@ -68,28 +241,72 @@ class SheetsManager ():
                 row_index = data.index(row_data) + row
                 
                 cell_range = self.get_range(row_index, column, len(row_data))
-                self.worksheet.update(cell_range, data)
+                self.__request__("write", self.worksheet.update, cell_range, data)
+
+    def write_batch(self, data: dict):
+        """ Write many ranges of the worksheet in a single request
+
+        Args:
+            data (dict): ranges (A1 notation) and its rows of values
+        """
+
+        if not data:
+            return
+
+        body = {
+            "valueInputOption": "RAW",
+            "data": [
+                {
+                    "range": f"'{self.worksheet.title}'!{cell_range}",
+                    "values": values
+                }
+                for cell_range, values in data.items()
+            ]
+        }
+        self.__request__("write", self.sheet.values_batch_update, body=body)
 
     def get_data(self):
         """ Read all records of the sheet"""
 
-        records = self.worksheet.get_all_records()
+        records = self.__request__("read", self.worksheet.get_all_records)
         return records
 
+    def get_values(self, cell_range: str) -> list:
+        """ Read the values of a range
+
+        Args:
+            cell_range (str): range in A1 notation
+
+        Returns:
+            list: rows of values
+        """
+
+        return self.__request__("read", self.worksheet.get, cell_range)
+
+    def get_row_values(self, row: int) -> list:
+        """ Read the values of a row """
+
+        return self.__request__("read", self.worksheet.row_values, row)
+
+    def get_col_values(self, column: int) -> list:
+        """ Read the values of a column (with the header) """
+
+        return self.__request__("read", self.worksheet.col_values, column)
+
     def get_rows_num(self) -> int:
         """ Get number of the rows in use """
 
-        return len(self.worksheet.col_values(1))
+        return len(self.__request__("read", self.worksheet.col_values, 1))
 
     def get_cols_num(self) -> int:
         """ Get number of the columns in use """
 
-        return len(self.worksheet.rows_values(1))
+        return len(self.get_row_values(1))
 
     def delete_row(self, row: int):
         """ Delete a row of the sheet """
 
-        self.worksheet.delete_row(row)
+        self.__request__("write", self.worksheet.delete_row, row)
 
     def get_range(self, row, start_col, end_col) -> str:
         """ Return the range of the cells
@@ -107,6 +324,22 @@ class SheetsManager ():
         end_cell = gspread.utils.rowcol_to_a1(row, end_col)
         return f"{start_cell}:{end_cell}"
     
+    def get_column_range(self, column, start_row, end_row) -> str:
+        """ Return the range of the cells of a column
+        
+        Args:
+            column (int): column number
+            start_row (int): start row number
+            end_row (int): end row number
+            
+        Returns:
+            str: range of the cells
+        """
+        
+        start_cell = gspread.utils.rowcol_to_a1(start_row, column)
+        end_cell = gspread.utils.rowcol_to_a1(end_row, column)
+        return f"{start_cell}:{end_cell}"
+    
     def set_bg_color(self, range: str, color_values: tuple):
         """ Set the background color of a cell
         
@@ -123,4 +356,41 @@ class SheetsManager ():
         cell_format = CellFormat(backgroundColor=bg_color)
 
         # Aplicar el formato
-        format_cell_range(self.worksheet, cell_range, cell_format)
\ No newline at end of file
+        self.__request__("write", format_cell_range, self.worksheet,
+                         cell_range, cell_format)
+
+    def set_bg_colors(self, ranges_colors: dict):
+        """ Set the background color of many ranges in a single request
+
+        Args:
+            ranges_colors (dict): ranges (A1 notation) and colors (r, g, b),
+                None to remove the background color (keep the banding)
+        """
+
+        if not ranges_colors:
+            return
+
+        requests = []
+        for cell_range, color_values in ranges_colors.items():
+            cell_format = {}
+            if color_values is not None:
+                red, green, blue = color_values
+                cell_format["backgroundColor"] = {
+                    "red": red,
+                    "green": green,
+                    "blue": blue
+                }
+            requests.append({
+                "repeatCell": {
+                    "range": gspread.utils.a1_range_to_grid_range(
+                        cell_range,
+                        self.worksheet.id
+                    ),
+                    "cell": {
+                        "userEnteredFormat": cell_format
+                    },
+                    "fields": "userEnteredFormat.backgroundColor"
+                }
+            })
+
+        self.__request__("write", self.sheet.batch_update, {"requests": requests})
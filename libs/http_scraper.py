@@ -0,0 +1,281 @@
+import os
+import math
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qsl
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from libs.timing import traced
+from libs.rate_limiter import AdaptiveRateLimiter
+from libs.property_data import (
+    PropertyRecord,
+    build_property_data,
+    listing_to_raw_data,
+    get_missing_fields,
+    parse_search_payload,
+)
+
+
+# Paths
+current_path = os.path.dirname(os.path.abspath(__file__))
+cookies_path = os.path.join(current_path, "cookies.pkl")
+
+# Params of the page link used only by the map (not sent to the api)
+MAP_PARAMS = ["lat", "lon", "zoom", "offset", "limit"]
+
+
+class HttpScraper():
+    """ Scrape the LGBS search and details api directly (without browser),
+    with a pool of http connections and concurrent requests. Return the same
+    property data as Scraper.get_property_data
+    """
+
+    def __init__(self, page_link: str, workers: int = 8, page_size: int = 10,
+                 rate_limiter: AdaptiveRateLimiter = None, time_out: int = 30,
+                 cookies_path: str = cookies_path):
+        """ Initialize the scraper
+
+        Args:
+            page_link (str): link to the results page (with filters)
+            workers (int): max concurrent requests
+            page_size (int): properties by page (10 as the results page,
+                to share the page checkpoints with the browser engine)
+            rate_limiter (AdaptiveRateLimiter): control the time between
+                requests (optional)
+            time_out (int): max seconds of each request
+            cookies_path (str): pickle file with the cookies of the browser
+                session, with the terms of service accepted
+        """
+
+        print("Starting http scraper...")
+
+        self.page_link = page_link
+        self.workers = workers
+        self.page_size = page_size
+        self.rate_limiter = rate_limiter
+        self.rate_limiter_lock = threading.Lock()
+        self.time_out = time_out
+
+        # Search api link and filters, from the page link
+        self.api_link, self.api_params = get_api_link(page_link)
+
+        # Connections pool with retries: a connection by worker for the
+        # search pages and another for the details requested by them
+        retries = Retry(total=3, backoff_factor=1,
+                        status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers * 2,
+                              max_retries=retries)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Referer": page_link,
+        })
+        self.__load_cookies__(cookies_path)
+
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def __load_cookies__(self, cookies_path: str):
+        """ Load the cookies saved by the browser engine (see
+        WebScraping.save_cookies), with the terms of service accepted
+
+        Args:
+            cookies_path (str): path of the pickle file (empty to skip)
+        """
+
+        if not cookies_path:
+            return
+
+        if not os.path.isfile(cookies_path):
+            print("Warning: Cookies file not found. Run the browser engine once "
+                  "to accept the terms of service.")
+            return
+
+        with open(cookies_path, "rb") as cookies_file:
+            session = pickle.load(cookies_file)
+
+        for cookie in session["cookies"]:
+            self.session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+            )
+
+    def __get_json__(self, url: str, params: dict = None):
+        """ Request a json response, waiting for the rate limiter
+
+        Args:
+            url (str): url of the api
+            params (dict): query params
+
+        Returns:
+            dict or list: json body
+        """
+
+        if self.rate_limiter:
+            with self.rate_limiter_lock:
+                self.rate_limiter.acquire()
+
+        try:
+            response = self.session.get(url, params=params, timeout=self.time_out)
+            if response.status_code in (401, 403):
+                raise PermissionError(
+                    f"Access denied by the api ({response.status_code}). "
+                    "Accept the terms of service with the browser engine "
+                    "to update the cookies file."
+                )
+            response.raise_for_status()
+        except requests.RequestException:
+            if self.rate_limiter:
+                with self.rate_limiter_lock:
+                    self.rate_limiter.record_error()
+            raise
+
+        if self.rate_limiter:
+            with self.rate_limiter_lock:
+                self.rate_limiter.record_success(
+                    response.elapsed.total_seconds(),
+                    "request"
+                )
+        return response.json()
+
+    def get_search_page(self, page_num: int) -> dict:
+        """ Request a page of the search api
+
+        Args:
+            page_num (int): number of the page (from 1)
+
+        Returns:
+            dict: search response ({count, next, results})
+        """
+
+        params = dict(self.api_params)
+        params["limit"] = self.page_size
+        params["offset"] = (page_num - 1) * self.page_size
+        return self.__get_json__(self.api_link, params)
+
+    def get_details(self, account_number: str) -> dict:
+        """ Request the details of a property
+
+        Args:
+            account_number (str): account number
+
+        Returns:
+            dict: listing data
+        """
+
+        return self.__get_json__(f"{self.api_link}{account_number}/")
+
+    def get_listing_property(self, listing: dict) -> PropertyRecord:
+        """ Build the property data of a listing, requesting its details
+        only if there are missing fields
+
+        Args:
+            listing (dict): listing of the search api
+
+        Returns:
+            PropertyRecord: property data (see build_property_data)
+        """
+
+        raw_data = listing_to_raw_data(listing)
+        missing_fields = get_missing_fields(raw_data, listing)
+        if missing_fields and raw_data["account_number"]:
+            details = listing_to_raw_data(self.get_details(raw_data["account_number"]))
+            for field in missing_fields:
+                raw_data[field] = details[field]
+
+        return build_property_data(raw_data, self.page_link)
+
+    @traced("get_http_page")
+    def get_page_properties(self, page_num: int) -> tuple:
+        """ Extract the properties of a page, requesting the details
+        of the listings concurrently
+
+        Args:
+            page_num (int): number of the page (from 1)
+
+        Returns:
+            tuple: total of results (0 if unknown), if there are more pages
+                (next link or full page) and properties data of the page
+        """
+
+        payload = self.get_search_page(page_num)
+        listings = parse_search_payload(payload)
+        properties = list(self.executor.map(self.get_listing_property, listings))
+
+        count = 0
+        has_next = len(listings) >= self.page_size
+        if isinstance(payload, dict):
+            count = payload.get("count") or 0
+            has_next = has_next or bool(payload.get("next"))
+        return count, has_next, properties
+
+    def iter_pages(self, start_page: int = 1):
+        """ Extract all pages from start_page, requesting the next pages
+        concurrently (as many as workers) and returning them in order
+
+        Args:
+            start_page (int): first page to extract
+
+        Yields:
+            tuple: number of the page and its properties data
+        """
+
+        # First page (with the total of results)
+        count, has_next, properties = self.get_page_properties(start_page)
+        if not properties:
+            return
+        yield start_page, properties
+        pages_num = math.ceil(count / self.page_size)
+
+        # Next pages, in batches of concurrent requests, until an empty
+        # page or a page without next (the count is only used to size
+        # the batches, as it can change during the scraping: pages after
+        # the count are requested one by one)
+        with ThreadPoolExecutor(max_workers=self.workers) as pages_executor:
+            page_num = start_page + 1
+            while has_next:
+                batch_end = page_num + 1
+                if pages_num >= page_num:
+                    batch_end = min(page_num + self.workers, pages_num + 1)
+                batch = range(page_num, batch_end)
+                results = pages_executor.map(self.get_page_properties, batch)
+                for batch_page, (_, has_next, properties) in zip(batch, results):
+                    if not properties:
+                        return
+                    yield batch_page, properties
+                    if not has_next:
+                        return
+                page_num = batch_end
+
+    def close(self):
+        """ Stop the workers and close the connections """
+
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+def get_api_link(page_link: str) -> tuple:
+    """ Return the search api link and its filters, from the results
+    page link (same filters of the map)
+
+    Args:
+        page_link (str): link to the results page
+
+    Returns:
+        tuple: api link and params
+    """
+
+    parsed_link = urlparse(page_link)
+    api_link = f"{parsed_link.scheme}://{parsed_link.netloc}/api/property_sales/"
+    params = {
+        key: value for key, value in parse_qsl(parsed_link.query)
+        if key not in MAP_PARAMS
+    }
+    return api_link, params
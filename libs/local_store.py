@@ -0,0 +1,285 @@
+import json
+import sqlite3
+from datetime import datetime
+
+
+class LocalStore():
+    """ SQLite database with the rows of the output sheet, indexed by account
+    number, and the status history of each property. Rows not written in the
+    sheet yet are marked as dirty
+    """
+
+    def __init__(self, db_path: str):
+        """ Construtor of the class
+
+        Args:
+            db_path (str): path of the database file (created if not exists)
+        """
+
+        # The connection is used from the persistence thread
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS properties (
+                    account_key TEXT PRIMARY KEY,
+                    account_number TEXT NOT NULL,
+                    row_num INTEGER NOT NULL,
+                    row_values TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT '',
+                    address_error INTEGER NOT NULL DEFAULT 0,
+                    synced_error INTEGER NOT NULL DEFAULT 0,
+                    dirty INTEGER NOT NULL DEFAULT 0,
+                    is_new INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS properties_dirty
+                    ON properties (dirty);
+                CREATE TABLE IF NOT EXISTS status_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    account_key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    changed_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS status_history_account
+                    ON status_history (account_key);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+            """)
+
+    def get_meta(self, key: str, default=None):
+        """ Read a value of the meta table (saved as json)
+
+        Args:
+            key (str): name of the value
+            default (any): value to return if not found
+
+        Returns:
+            any: saved value
+        """
+
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return default
+        return json.loads(row["value"])
+
+    def set_meta(self, key: str, value):
+        """ Save a value in the meta table (as json)
+
+        Args:
+            key (str): name of the value
+            value (any): value to save
+        """
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value))
+            )
+
+    def is_empty(self) -> bool:
+        """ Validate if there are no properties saved """
+
+        row = self.connection.execute("SELECT 1 FROM properties LIMIT 1").fetchone()
+        return row is None
+
+    def replace_all(self, headers: list, rows: list, next_row: int):
+        """ Replace all properties with the data of the sheet (synced rows).
+        The status history is kept
+
+        Args:
+            headers (list): columns titles of the sheet
+            rows (list): rows of the sheet
+                [
+                    {
+                        account_key (str): normalized account number
+                        account_number (str): account number
+                        row_num (int): sheet row number
+                        values (list): values of the row
+                        status (str): status of the sale
+                        address_error (bool): if the row is highlighted
+                    }
+                ]
+            next_row (int): next empty row of the sheet
+        """
+
+        now = datetime.now().isoformat()
+        with self.connection:
+            self.connection.execute("DELETE FROM properties")
+            self.connection.executemany(
+                """
+                INSERT OR IGNORE INTO properties (
+                    account_key, account_number, row_num, row_values, status,
+                    address_error, synced_error, dirty, is_new, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, 0, 0, ?)
+                """,
+                [
+                    (
+                        row["account_key"],
+                        str(row["account_number"]),
+                        row["row_num"],
+                        json.dumps(row["values"]),
+                        str(row["status"]),
+                        int(row["address_error"]),
+                        int(row["address_error"]),
+                        now,
+                    )
+                    for row in rows
+                ]
+            )
+
+            # First status of the properties without history
+            self.connection.execute(
+                """
+                INSERT INTO status_history (account_key, status, changed_at)
+                SELECT account_key, status, ? FROM properties
+                WHERE account_key NOT IN (SELECT account_key FROM status_history)
+                """,
+                (now,)
+            )
+
+            for key, value in (("headers", headers), ("next_row", next_row)):
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value))
+                )
+
+    def save_row(self, account_key: str, account_number: str, row_num: int,
+                 values: list, status: str, address_error: bool, is_new: bool):
+        """ Save a row pending to write in the sheet (dirty), and its status
+        in the history if it changed
+
+        Args:
+            account_key (str): normalized account number
+            account_number (str): account number
+            row_num (int): sheet row number
+            values (list): values of the row
+            status (str): status of the sale
+            address_error (bool): if the row must be highlighted
+            is_new (bool): if the row is not in the sheet yet
+        """
+
+        now = datetime.now().isoformat()
+        status = str(status)
+        with self.connection:
+            old_row = self.connection.execute(
+                "SELECT status, is_new FROM properties WHERE account_key = ?",
+                (account_key,)
+            ).fetchone()
+            if not old_row or old_row["status"] != status:
+                self.connection.execute(
+                    """
+                    INSERT INTO status_history (account_key, status, changed_at)
+                    VALUES (?, ?, ?)
+                    """,
+                    (account_key, status, now)
+                )
+
+            # Rows inserted and not written yet keep the new flag
+            is_new = is_new or bool(old_row and old_row["is_new"])
+            self.connection.execute(
+                """
+                INSERT INTO properties (
+                    account_key, account_number, row_num, row_values, status,
+                    address_error, dirty, is_new, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT (account_key) DO UPDATE SET
+                    account_number = excluded.account_number,
+                    row_num = excluded.row_num,
+                    row_values = excluded.row_values,
+                    status = excluded.status,
+                    address_error = excluded.address_error,
+                    dirty = 1,
+                    is_new = excluded.is_new,
+                    updated_at = excluded.updated_at
+                """,
+                (account_key, str(account_number), row_num, json.dumps(values),
+                 status, int(address_error), int(is_new), now)
+            )
+
+    def mark_synced(self, account_keys: list):
+        """ Mark rows as written in the sheet
+
+        Args:
+            account_keys (list): normalized account numbers
+        """
+
+        with self.connection:
+            self.connection.executemany(
+                """
+                UPDATE properties
+                SET dirty = 0, is_new = 0, synced_error = address_error
+                WHERE account_key = ?
+                """,
+                [(account_key,) for account_key in account_keys]
+            )
+
+    def __row_to_dict__(self, row: sqlite3.Row) -> dict:
+        """ Format a row of the properties table """
+
+        return {
+            "account_key": row["account_key"],
+            "account_number": row["account_number"],
+            "row_num": row["row_num"],
+            "values": json.loads(row["row_values"]),
+            "status": row["status"],
+            "address_error": bool(row["address_error"]),
+            "synced_error": bool(row["synced_error"]),
+            "dirty": bool(row["dirty"]),
+            "is_new": bool(row["is_new"]),
+        }
+
+    def get_rows(self) -> list:
+        """ Return all properties, sorted by sheet row
+
+        Returns:
+            list: rows (see __row_to_dict__)
+        """
+
+        rows = self.connection.execute(
+            "SELECT * FROM properties ORDER BY row_num"
+        ).fetchall()
+        return [self.__row_to_dict__(row) for row in rows]
+
+    def get_dirty_rows(self) -> list:
+        """ Return the properties not written in the sheet yet
+
+        Returns:
+            list: rows (see __row_to_dict__)
+        """
+
+        rows = self.connection.execute(
+            "SELECT * FROM properties WHERE dirty = 1 ORDER BY row_num"
+        ).fetchall()
+        return [self.__row_to_dict__(row) for row in rows]
+
+    def get_status_history(self, account_key: str) -> list:
+        """ Return the status changes of a property
+
+        Args:
+            account_key (str): normalized account number
+
+        Returns:
+            list: changes, from the oldest ({status (str), changed_at (str)})
+        """
+
+        rows = self.connection.execute(
+            """
+            SELECT status, changed_at FROM status_history
+            WHERE account_key = ? ORDER BY id
+            """,
+            (account_key,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        """ Close the database connection """
+
+        self.connection.close()
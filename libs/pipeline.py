@@ -0,0 +1,109 @@
+import queue
+import threading
+
+from libs.timing import tracer
+from libs.cache_manager import CacheManager
+
+
+def handle_message(cache: CacheManager, sinks: list, message: dict):
+    """ Save in the sinks (or cache) a message sent by a scraper
+
+    Args:
+        cache (CacheManager): checkpoints of the scraping
+        sinks (list): destinations of the properties (see RecordSink)
+        message (dict): scraped data
+            {
+                type (str): "property", "page" (page started) or "done"
+                data (PropertyRecord): property data (type "property")
+                page_link (str): link of the page (types "page" and "done")
+                page_num (int): number of the page (types "page" and "done")
+                worker (int): id of the worker (optional)
+            }
+    """
+
+    if message["type"] == "property":
+        tracer.count_property()
+        for sink in sinks:
+            sink.write(message["data"])
+        return
+
+    # Save rows of the last page before the checkpoint
+    for sink in sinks:
+        sink.page_done()
+    finished = message["type"] == "done"
+    cache.update_page_cache(message["page_link"], message["page_num"],
+                            finished, message.get("worker"))
+
+
+class PersistenceWorker(threading.Thread):
+    """ Save the scraped data in a background thread, so the browser
+    keeps working while the sheets requests and file writes are running
+    """
+
+    def __init__(self, cache: CacheManager, sinks: list, max_size: int = 50):
+        """ Construtor of the class
+
+        Args:
+            cache (CacheManager): checkpoints of the scraping
+            sinks (list): destinations of the properties (only used
+                from this thread after start)
+            max_size (int): max messages waiting in the queue (the scraper
+                waits when the queue is full)
+        """
+
+        super().__init__(daemon=True)
+
+        self.cache = cache
+        self.sinks = sinks
+        self.queue = queue.Queue(maxsize=max_size)
+        self.error = None
+
+    def run(self):
+        """ Save messages until the stop message (None) is received.
+        After an error the messages are discarded, to not block the scraper
+        """
+
+        while True:
+            message = self.queue.get()
+            if message is None:
+                break
+
+            if self.error:
+                continue
+
+            try:
+                handle_message(self.cache, self.sinks, message)
+            except BaseException as error:
+                self.error = error
+
+        # Save pending records in the sinks
+        if not self.error:
+            try:
+                for sink in self.sinks:
+                    sink.page_done()
+            except BaseException as error:
+                self.error = error
+
+    def raise_if_failed(self):
+        """ Raise in the scraper thread the error of the persistence thread """
+
+        if self.error:
+            raise RuntimeError("Error saving the scraped data") from self.error
+
+    def put(self, message: dict):
+        """ Send a message to save (see handle_message), waiting if the
+        queue is full
+
+        Args:
+            message (dict): scraped data
+        """
+
+        self.raise_if_failed()
+        self.queue.put(message)
+
+    def close(self):
+        """ Save all pending messages and stop the thread """
+
+        self.queue.put(None)
+        self.join()
+        self.raise_if_failed()
@@ -0,0 +1,510 @@
+import re
+import json
+import hashlib
+from datetime import datetime
+
+
+# Raw fields read from the page, before formatting
+RAW_FIELDS = [
+    "address",
+    "country",
+    "maps_link",
+    "sale_date",
+    "status",
+    "sale_type",
+    "sale_notes",
+    "judgment_date",
+    "adjudget_value",
+    "es_min_bid",
+    "account_number",
+    "cause_number",
+    "case_style",
+]
+
+# Raw fields that must have a value to skip the details modal
+REQUIRED_FIELDS = [
+    "address",
+    "sale_date",
+    "status",
+    "sale_type",
+    "adjudget_value",
+    "es_min_bid",
+    "account_number",
+    "cause_number",
+    "case_style",
+]
+
+# Fields of the property data, in the columns order of the sheets
+OUTPUT_FIELDS = [
+    "street",
+    "city",
+    "state",
+    "zip_code",
+    "country",
+    "maps_link",
+    "sale_date",
+    "status",
+    "sale_type",
+    "date_pulled",
+    "sale_notes",
+    "judgment_date",
+    "adjudget_value",
+    "es_min_bid",
+    "equity",
+    "equity_percent",
+    "account_number",
+    "case_number",
+    "case_style",
+    "link",
+    "address_error",
+]
+
+# Columns of the sheets read by title (the other columns are read by
+# position, in OUTPUT_FIELDS order)
+HEADER_FIELDS = {
+    "Property Street": "street",
+    "Status": "status",
+    "Account Number": "account_number",
+}
+
+# Fields not compared to detect changes in a property (date of the scraping
+# and results page used in the run)
+VOLATILE_FIELDS = [
+    "date_pulled",
+    "link",
+]
+
+# Money fields saved as numbers in PropertyRecord ("$" text in the sheets)
+MONEY_FIELDS = [
+    "adjudget_value",
+    "es_min_bid",
+    "equity",
+]
+
+# Keys of the angular "listing" object for each raw field (first found is used)
+LISTING_FIELDS = {
+    "address": ["address_full", "full_address", "address"],
+    "country": ["county", "country"],
+    "maps_link": ["maps_link", "map_link", "google_maps_link"],
+    "sale_date": ["sale_date", "sale_datetime"],
+    "status": ["status", "sale_status"],
+    "sale_type": ["sale_type", "type"],
+    "sale_notes": ["sale_notes", "notes"],
+    "judgment_date": ["judgment_date", "judgement_date"],
+    "adjudget_value": ["value", "adjudged_value", "adjudged_val"],
+    "es_min_bid": ["minimum_bid", "min_bid", "est_min_bid"],
+    "account_number": ["account_nbr", "account_number", "account_num"],
+    "cause_number": ["cause_nbr", "cause_number", "case_number"],
+    "case_style": ["style", "case_style"],
+}
+
+# Keys of the listing address parts, used when there is no full address
+LISTING_ADDRESS_FIELDS = {
+    "street": ["prop_address_one", "address_one", "street"],
+    "city": ["prop_city", "city"],
+    "state": ["prop_state", "state"],
+    "zip_code": ["prop_zipcode", "zip_code", "zipcode"],
+}
+
+# Other keys of the listing used to build a raw field (see listing_to_raw_data)
+LISTING_SOURCE_FIELDS = {
+    "address": LISTING_ADDRESS_FIELDS["street"],
+    "maps_link": ["latitude", "lat", "longitude", "lng", "lon", "geometry"],
+}
+
+
+def parse_number(value, suffix: str = ""):
+    """ Convert a money (or percent) text to number
+
+    Args:
+        value (any): value of the cell, like "$1,234.5" or "12.5%"
+        suffix (str): symbol removed from the text ("%" for percents)
+
+    Returns:
+        float or str: number (the original text if it is not a number)
+    """
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+
+    text = str(value).strip()
+    number_text = text.replace("$", "").replace(",", "")
+    if suffix:
+        number_text = number_text.replace(suffix, "")
+    try:
+        return float(number_text)
+    except ValueError:
+        return text
+
+
+class PropertyRecord():
+    """ Data of a property, with a fixed attribute by field of OUTPUT_FIELDS
+    (without a dict by instance, to keep thousands of rows in memory).
+    Money fields and equity_percent are saved as numbers
+    """
+
+    __slots__ = tuple(OUTPUT_FIELDS)
+
+    def __init__(self, **fields):
+        """ Construtor of the class
+
+        Args:
+            **fields: values of the record (same keys as OUTPUT_FIELDS,
+                empty text if missing)
+        """
+
+        for field in OUTPUT_FIELDS:
+            setattr(self, field, fields.get(field, ""))
+
+    @classmethod
+    def from_row(cls, values: list) -> "PropertyRecord":
+        """ Create a record from a sheet row
+
+        Args:
+            values (list): values of the row, in OUTPUT_FIELDS order
+                (missing columns are saved as empty text)
+
+        Returns:
+            PropertyRecord: record with the parsed numbers
+        """
+
+        record = cls(**dict(zip(OUTPUT_FIELDS, values)))
+        for field in MONEY_FIELDS:
+            record.__set_number__(field, getattr(record, field))
+        record.__set_number__("equity_percent", record.equity_percent, "%")
+        if isinstance(record.address_error, str):
+            record.address_error = record.address_error.lower() == "true"
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict) -> "PropertyRecord":
+        """ Create a record from a sheet row read by columns titles
+        (HEADER_FIELDS by title, the other fields by position)
+
+        Args:
+            record (dict): values of the row by title, in the columns order
+
+        Returns:
+            PropertyRecord: record with the parsed numbers
+        """
+
+        values = list(record.values())
+        for title, field in HEADER_FIELDS.items():
+            if title in record:
+                values += [""] * (len(OUTPUT_FIELDS) - len(values))
+                values[OUTPUT_FIELDS.index(field)] = record[title]
+        return cls.from_row(values)
+
+    def __set_number__(self, field: str, value, suffix: str = ""):
+        """ Save a number field (empty values are kept as empty text) """
+
+        if value in (None, ""):
+            setattr(self, field, "")
+        else:
+            setattr(self, field, parse_number(value, suffix))
+
+    def __format_value__(self, field: str):
+        """ Return the value of a field as saved in the sheets
+        ("$" in money fields and "%" in equity_percent)
+        """
+
+        value = getattr(self, field)
+        if not isinstance(value, float):
+            return value
+        if field == "equity_percent":
+            return f"{value}%"
+        return f"${value}"
+
+    def to_row(self) -> list:
+        """ Return the values of the sheet row, in OUTPUT_FIELDS order
+
+        Returns:
+            list: formatted values
+        """
+
+        return [self.__format_value__(field) for field in OUTPUT_FIELDS]
+
+    def to_dict(self) -> dict:
+        """ Return the formatted values by field (see build_property_data)
+
+        Returns:
+            dict: property data
+        """
+
+        return dict(zip(OUTPUT_FIELDS, self.to_row()))
+
+    def __repr__(self) -> str:
+        return f"PropertyRecord({self.account_number!r}, {self.street!r})"
+
+
+def __get_listing_value__(listing: dict, keys: list) -> str:
+    """ Return the first non empty value of the listing keys
+
+    Args:
+        listing (dict): angular listing data
+        keys (list): keys to check, in order
+
+    Returns:
+        str: value found or empty string
+    """
+
+    for key in keys:
+        value = listing.get(key)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def listing_to_raw_data(listing: dict) -> dict:
+    """ Convert an angular listing (or api json item) to raw property data
+
+    Args:
+        listing (dict): listing data
+
+    Returns:
+        dict: raw fields (same keys as RAW_FIELDS), empty strings if missing
+            (see get_absent_fields for the fields not sent in the listing)
+    """
+
+    raw_data = {}
+    for field in RAW_FIELDS:
+        raw_data[field] = __get_listing_value__(listing, LISTING_FIELDS[field])
+
+    # Build address from its parts, with the same format of the details modal
+    if not raw_data["address"]:
+        parts = {}
+        for part, keys in LISTING_ADDRESS_FIELDS.items():
+            parts[part] = __get_listing_value__(listing, keys)
+        if parts["street"]:
+            region = " ".join(filter(None, [
+                parts["city"], parts["state"], parts["zip_code"]
+            ]))
+            raw_data["address"] = f"{parts['street']}, {region}"
+
+    # Build maps link from coordinates
+    if not raw_data["maps_link"]:
+        latitude = __get_listing_value__(listing, ["latitude", "lat"])
+        longitude = __get_listing_value__(listing, ["longitude", "lng", "lon"])
+        coordinates = (listing.get("geometry") or {}).get("coordinates")
+        if not (latitude and longitude) and coordinates and len(coordinates) == 2:
+            longitude, latitude = coordinates
+        if latitude and longitude:
+            raw_data["maps_link"] = "https://www.google.com/maps/search/" \
+                f"?api=1&query={latitude},{longitude}"
+
+    return raw_data
+
+
+def parse_search_payload(payload) -> list:
+    """ Return the listings of a search (or details) json response
+
+    Args:
+        payload (dict or list): json body of the response
+
+    Returns:
+        list: listings data
+    """
+
+    # Paginated results ({"count": ..., "results": [...]})
+    if isinstance(payload, dict) and isinstance(payload.get("results"), list):
+        return [item for item in payload["results"] if isinstance(item, dict)]
+
+    # Plain list of results
+    if isinstance(payload, list):
+        return [item for item in payload if isinstance(item, dict)]
+
+    # Single listing (details response)
+    if isinstance(payload, dict):
+        account_number = __get_listing_value__(
+            payload,
+            LISTING_FIELDS["account_number"]
+        )
+        if account_number:
+            return [payload]
+
+    return []
+
+
+def get_absent_fields(listing: dict) -> list:
+    """ Return the raw fields without any key in the listing (not sent
+    by the api, unlike the keys sent with empty values)
+
+    Args:
+        listing (dict): listing data
+
+    Returns:
+        list: names of the absent fields
+    """
+
+    absent_fields = []
+    for field in RAW_FIELDS:
+        keys = LISTING_FIELDS[field] + LISTING_SOURCE_FIELDS.get(field, [])
+        if not any(key in listing for key in keys):
+            absent_fields.append(field)
+    return absent_fields
+
+
+def get_missing_fields(raw_data: dict, listing: dict = None) -> list:
+    """ Return the required raw fields without value, and the raw fields
+    absent in the listing (see get_absent_fields)
+
+    Args:
+        raw_data (dict): raw property data
+        listing (dict): listing of the raw data (optional)
+
+    Returns:
+        list: names of the missing fields
+    """
+
+    missing_fields = [field for field in REQUIRED_FIELDS if not raw_data.get(field)]
+    if listing is not None:
+        for field in get_absent_fields(listing):
+            if field not in missing_fields:
+                missing_fields.append(field)
+    return missing_fields
+
+
+def build_property_data(raw_data: dict, link: str) -> PropertyRecord:
+    """ Format raw property data as the record saved in the sheets
+
+    Args:
+        raw_data (dict): raw fields (same keys as RAW_FIELDS)
+        link (str): link to the results page
+
+    Returns:
+        PropertyRecord: property data
+            {
+                street (str): street address
+                city (str): city
+                state (str): state
+                zip_code (str): zip code
+                country (str): country
+                maps_link (str): link to google maps
+                sale_date (str): date of the sale
+                status (str): status of the sale
+                sale_type (str): type of sale
+                date_pulled (str): date of the scraping
+                sale_notes (str): notes of the sale
+                judgment_date (str): date of the judgment
+                adjudget_value (float): adjudget value
+                es_min_bid (float): estimated minimum bid
+                equity (float): equity
+                equity_percent (float): equity percent
+                account_number (str): account number
+                case_number (str): case number
+                case_style (str): case style
+                link (str): link to the property,
+                address_error (bool): if there was an error in the address
+            }
+    """
+
+    # Extract address data
+    try:
+        address_parts = raw_data["address"].split(",")
+        street = address_parts[0]
+        address_parts = address_parts[1].split("-")
+        address_parts = address_parts[0].strip().split()
+        postal_code = address_parts[-1]
+        state = address_parts[-2]
+        city = " ".join(address_parts[:-2])
+    except Exception:
+        print("\t\tError: Address format not recognized. Skipping property address.")
+        street = raw_data["address"]
+        city = ""
+        state = ""
+        postal_code = ""
+
+    # Calculate equity and fix quantities
+    if not raw_data["adjudget_value"]:
+        raw_data["adjudget_value"] = "$0"
+    if not raw_data["es_min_bid"]:
+        raw_data["es_min_bid"] = "$0"
+    adjudget_value_str = raw_data["adjudget_value"].replace("$", "").replace(",", "")
+    es_min_bid_str = raw_data["es_min_bid"].replace("$", "").replace(",", "")
+    adjudget_value = float(adjudget_value_str)
+    es_min_bid = float(es_min_bid_str)
+    equity = adjudget_value - es_min_bid
+    equity_percent = 0
+    if adjudget_value > 0:
+        equity_percent = int(equity / adjudget_value * 10000) / 100
+
+    today = datetime.now().strftime("%m/%d/%Y")
+
+    return PropertyRecord(
+        street=street,
+        city=city,
+        state=state,
+        zip_code=postal_code,
+        country=raw_data["country"],
+        maps_link=raw_data["maps_link"],
+        sale_date=raw_data["sale_date"],
+        status=raw_data["status"],
+        sale_type=raw_data["sale_type"],
+        date_pulled=today,
+        sale_notes=raw_data["sale_notes"],
+        judgment_date=raw_data["judgment_date"],
+        adjudget_value=adjudget_value,
+        es_min_bid=es_min_bid,
+        equity=equity,
+        equity_percent=float(equity_percent),
+        account_number=raw_data["account_number"],
+        case_number=raw_data["cause_number"],
+        case_style=raw_data["case_style"],
+        link=link,
+        address_error=not bool(city),
+    )
+
+
+def __normalize_value__(value) -> str:
+    """ Format a value as text, with the same result for the scraped value
+    and the value read from the sheet (numbers and booleans are converted)
+
+    Args:
+        value (any): value of a cell
+
+    Returns:
+        str: normalized value
+    """
+
+    text = str(value).strip()
+    if text.lower() in ("true", "false"):
+        return text.lower()
+    try:
+        return f"{float(text):.4f}"
+    except ValueError:
+        return text
+
+
+def get_account_key(account_number) -> str:
+    """ Normalize an account number to compare it with the sheets
+    (sheets save numeric accounts as numbers, without left zeros)
+
+    Args:
+        account_number (str or int): account number
+
+    Returns:
+        str: account key
+    """
+
+    account_key = re.sub(r"[^0-9A-Z]", "", str(account_number).upper())
+    return account_key.lstrip("0") or account_key
+
+
+def get_row_hash(values: list) -> str:
+    """ Return a stable hash of the meaningful values of a row
+    (without VOLATILE_FIELDS), to detect properties without changes
+
+    Args:
+        values (list): values of the row, in OUTPUT_FIELDS order
+
+    Returns:
+        str: sha1 of the values
+    """
+
+    meaningful_values = [
+        __normalize_value__(value)
+        for field, value in zip(OUTPUT_FIELDS, values)
+        if field not in VOLATILE_FIELDS
+    ]
+    text = json.dumps(meaningful_values, ensure_ascii=False)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,113 @@
+import time
+
+
+class AdaptiveRateLimiter():
+    """ Token bucket that controls the time between page actions.
+    The rate grows slowly while the site is healthy (additive increase)
+    and drops by half when it is slow, fails or needs reloads
+    (multiplicative decrease)
+    """
+
+    def __init__(self, min_wait: float, max_wait: float, burst: int = 1,
+                 increase_steps: int = 20, decrease_factor: float = 0.5,
+                 slow_factor: float = 2):
+        """ Construtor of the class
+
+        Args:
+            min_wait (float): min seconds between actions (floor)
+            max_wait (float): max seconds between actions (ceiling)
+            burst (int): actions allowed without wait
+            increase_steps (int): healthy actions to go from the
+                slowest rate to the fastest one
+            decrease_factor (float): rate multiplier when the site degrades
+            slow_factor (float): load time, compared with the average,
+                considered as slow
+        """
+
+        # Rates in actions per second (min_wait 0 is limited to 20 per second)
+        self.min_rate = 1 / max(max_wait, min_wait, 0.05)
+        self.max_rate = 1 / max(min_wait, 0.05)
+        self.increase = (self.max_rate - self.min_rate) / increase_steps
+        self.decrease_factor = decrease_factor
+        self.slow_factor = slow_factor
+
+        # Start with the slowest rate
+        self.rate = self.min_rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+
+        # Average load time by action (exponential moving average)
+        # {action (str): {"average": float, "samples": int}}
+        self.load_times = {}
+
+        # Counters
+        self.stats = {"successes": 0, "slow": 0, "errors": 0, "reloads": 0}
+
+    @property
+    def wait_seconds(self) -> float:
+        """ Current seconds between actions """
+
+        return 1 / self.rate
+
+    def __refill__(self):
+        """ Add the tokens generated since the last refill """
+
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """ Wait until an action is allowed """
+
+        self.__refill__()
+        if self.tokens < 1:
+            time.sleep((1 - self.tokens) / self.rate)
+            self.__refill__()
+        self.tokens -= 1
+
+    def __slow_down__(self):
+        """ Decrease the rate (multiplicative) """
+
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        print(f"\t\tSite degraded. Waiting {self.wait_seconds:.1f} seconds "
+              "between actions...")
+
+    def record_success(self, load_time: float, action: str = "modal"):
+        """ Register a page action completed
+
+        Args:
+            load_time (float): seconds to load the page or modal
+            action (str): kind of action, to compare the load time
+                with the average of the same action ("modal", "page", etc)
+        """
+
+        # Slow loads (compared with the average) decrease the rate
+        load = self.load_times.setdefault(action, {"average": 0, "samples": 0})
+        is_slow = load["samples"] >= 3 \
+            and load_time > load["average"] * self.slow_factor
+        if load["samples"]:
+            load["average"] = load["average"] * 0.8 + load_time * 0.2
+        else:
+            load["average"] = load_time
+        load["samples"] += 1
+
+        if is_slow:
+            self.stats["slow"] += 1
+            self.__slow_down__()
+            return
+
+        self.stats["successes"] += 1
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_error(self):
+        """ Register a failed page action (time out, missing data) """
+
+        self.stats["errors"] += 1
+        self.__slow_down__()
+
+    def record_reload(self):
+        """ Register a reload of the results page """
+
+        self.stats["reloads"] += 1
+        self.__slow_down__()
@@ -0,0 +1,52 @@
+from urllib.parse import urlparse
+
+
+# Url patterns (CDP Network.setBlockedURLs format, "*" as wildcard)
+# of resources never read by the scraper, blocked in all sites
+COMMON_BLOCKED_URLS = [
+
+    # Images and fonts
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico", "*.svg",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*fonts.googleapis.com*",
+    "*fonts.gstatic.com*",
+
+    # Analytics and ads
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*facebook.net*",
+    "*hotjar.com*",
+]
+
+# Extra patterns by site host. Map scripts are not blocked (the results
+# page waits for them), only the map tiles and its images
+SITE_BLOCKED_URLS = {
+    "taxsales.lgbs.com": [
+        "*maps.googleapis.com/maps/vt*",
+        "*maps.googleapis.com/maps/api/js/StaticMapService*",
+        "*maps.gstatic.com/mapfiles/*",
+        "*khms*.googleapis.com*",
+        "*tile.openstreetmap.org*",
+    ],
+}
+
+
+def get_blocked_urls(page_link: str, extra_urls: list = []) -> list:
+    """ Return the url patterns to block in a site
+
+    Args:
+        page_link (str): link of the page to scrape
+        extra_urls (list): other patterns to block (like the env settings)
+
+    Returns:
+        list: url patterns (common, of the site and extra ones)
+    """
+
+    host = urlparse(page_link).hostname or ""
+    blocked_urls = list(COMMON_BLOCKED_URLS)
+    for site, site_urls in SITE_BLOCKED_URLS.items():
+        if host == site or host.endswith(f".{site}"):
+            blocked_urls += site_urls
+    blocked_urls += [url for url in extra_urls if url]
+    return blocked_urls
@@ -0,0 +1,248 @@
+""" Scrape many searches (like one by county) in a single run, sharing
+a pool of browsers between them
+
+Job file (json):
+    {
+        "jobs": [
+            {
+                "name": "harris",
+                "page_link": "https://taxsales.lgbs.com/map?...",
+                "sheet_output": "Harris",
+                "sheet_input": "Harris Input",
+                "workers": 2
+            }
+        ]
+    }
+"""
+
+import os
+import re
+import json
+import queue
+import multiprocessing
+from collections import deque
+
+from libs.cache_manager import CacheManager
+from libs.pipeline import handle_message
+from libs.worker_pool import scrape_shard, get_pending_shards
+
+
+# Default values of the optional job fields
+JOB_DEFAULTS = {
+    "google_sheet_link": "",
+    "sheet_output": "",
+    "sheet_input": "",
+    "skip_input": False,
+    "workers": 1,
+    "export": [],
+    "store_path": "",
+}
+
+
+def load_jobs(jobs_path: str) -> list:
+    """ Read the searches to scrape from the job file
+
+    Args:
+        jobs_path (str): path of the json job file
+
+    Returns:
+        list: jobs data
+            [
+                {
+                    name (str): unique name of the job (used in the cache file)
+                    page_link (str): link to the results page (with filters)
+                    google_sheet_link (str): google sheet link (default
+                        GOOGLE_SHEET_LINK)
+                    sheet_output (str): output sheet of the job
+                    sheet_input (str): input sheet of the job (optional)
+                    skip_input (bool): skip properties found in the input sheet
+                    workers (int): max browsers scraping the job at the same
+                        time (pages are split between them)
+                    export (list): files to save the properties (optional)
+                    store_path (str): local database of the output sheet
+                        (optional, see LocalStore)
+                }
+            ]
+    """
+
+    with open(jobs_path, "r") as file:
+        jobs_data = json.load(file)
+
+    jobs = []
+    names = set()
+    for job_data in jobs_data.get("jobs", []):
+        job = dict(JOB_DEFAULTS)
+        job.update(job_data)
+
+        if not job.get("name") or not job.get("page_link"):
+            raise ValueError(f"Job without name or page_link: {job_data}")
+        if job["name"] in names:
+            raise ValueError(f"Duplicated job name: '{job['name']}'")
+        names.add(job["name"])
+
+        job["workers"] = max(1, int(job["workers"]))
+        jobs.append(job)
+
+    return jobs
+
+
+def get_job_cache_path(cache_folder: str, job_name: str) -> str:
+    """ Return the checkpoints file of a job
+
+    Args:
+        cache_folder (str): folder of the jobs checkpoints
+        job_name (str): name of the job
+
+    Returns:
+        str: path of the json file
+    """
+
+    file_name = re.sub(r"[^0-9A-Za-z_-]+", "_", job_name)
+    return os.path.join(cache_folder, f"{file_name}.json")
+
+
+class JobScheduler():
+    """ Run the pages shards of all jobs (see scrape_shard) in a shared pool
+    of browsers, starting the shards of each job in turns, and save the data
+    of each job in its own sinks and checkpoints (from this process)
+    """
+
+    def __init__(self, jobs: list, pool_size: int, settings: dict,
+                 cache_folder: str):
+        """ Construtor of the class
+
+        Args:
+            jobs (list): jobs to run (see load_jobs), with their
+                destinations in the "sinks" key (see RecordSink) and the
+                accounts to skip in the "skip_accounts" key (optional)
+            pool_size (int): max browsers running at the same time
+            settings (dict): scraper settings of all jobs, without the
+                page link (see scrape_shard)
+            cache_folder (str): folder of the jobs checkpoints
+        """
+
+        self.jobs = {job["name"]: job for job in jobs}
+        self.pool_size = pool_size
+        self.settings = settings
+
+        # Checkpoints of each job
+        os.makedirs(cache_folder, exist_ok=True)
+        self.caches = {
+            job["name"]: CacheManager(get_job_cache_path(cache_folder, job["name"]))
+            for job in jobs
+        }
+
+        # Shards waiting by job, in the order the jobs are served
+        self.pending = {
+            name: deque(get_pending_shards(self.caches[name], job["workers"]))
+            for name, job in self.jobs.items()
+        }
+        self.turns = deque(self.jobs)
+
+        # Running shards ((job, worker): (process, browser slot))
+        self.running = {}
+        self.running_by_job = {name: 0 for name in self.jobs}
+        self.free_slots = list(range(pool_size - 1, -1, -1))
+        self.messages = multiprocessing.Queue(maxsize=pool_size * 20)
+
+    def __get_next_shard__(self) -> tuple:
+        """ Return the next shard to start: the first job in turn with
+        pending shards and below its workers limit (the job goes to the
+        end of the turns)
+
+        Returns:
+            tuple: job name, worker id and start page (None if no shard
+                can start now)
+        """
+
+        for _ in range(len(self.turns)):
+            name = self.turns[0]
+            self.turns.rotate(-1)
+            is_limited = self.running_by_job[name] >= self.jobs[name]["workers"]
+            if self.pending[name] and not is_limited:
+                worker, start_page = self.pending[name].popleft()
+                return name, worker, start_page
+        return None
+
+    def __start_shards__(self):
+        """ Start shards while there are free browsers """
+
+        while self.free_slots:
+            shard = self.__get_next_shard__()
+            if not shard:
+                return
+
+            name, worker, start_page = shard
+            slot = self.free_slots.pop()
+            settings = dict(self.settings)
+            settings.update({
+                "page_link": self.jobs[name]["page_link"],
+                "job": name,
+                "browser_slot": slot,
+                "skip_accounts": self.jobs[name].get("skip_accounts", set()),
+            })
+
+            print(f"Job {name}: starting worker {worker} from page {start_page}...")
+            process = multiprocessing.Process(
+                target=scrape_shard,
+                args=(worker, self.jobs[name]["workers"], start_page, settings,
+                      self.messages),
+                daemon=True,
+            )
+            process.start()
+            self.running[(name, worker)] = (process, slot)
+            self.running_by_job[name] += 1
+
+    def __finish_shard__(self, name: str, worker: int):
+        """ Release the browser of a shard
+
+        Args:
+            name (str): name of the job
+            worker (int): id of the worker
+        """
+
+        process, slot = self.running.pop((name, worker))
+        process.join(timeout=30)
+        self.running_by_job[name] -= 1
+        self.free_slots.append(slot)
+
+    def run(self):
+        """ Run all pending shards and save their data, until all of them
+        finish (failed shards are resumed in the next run)
+        """
+
+        try:
+            self.__start_shards__()
+            while self.running:
+                try:
+                    message = self.messages.get(timeout=5)
+                except queue.Empty:
+
+                    # Release shards that died without a message
+                    for name, worker in list(self.running):
+                        process = self.running[(name, worker)][0]
+                        if not process.is_alive():
+                            print(f"Error: Job {name}: worker {worker} "
+                                  "stopped unexpectedly.")
+                            self.__finish_shard__(name, worker)
+                    self.__start_shards__()
+                    continue
+
+                name = message["job"]
+                worker = message["worker"]
+                if message["type"] == "error":
+                    print(f"Error: Job {name}: worker {worker} failed:\n"
+                          f"{message['error']}")
+                    self.__finish_shard__(name, worker)
+                    self.__start_shards__()
+                    continue
+
+                handle_message(self.caches[name], self.jobs[name]["sinks"], message)
+                if message["type"] == "done":
+                    print(f"Job {name}: worker {worker} done.")
+                    self.__finish_shard__(name, worker)
+                    self.__start_shards__()
+        finally:
+            for job in self.jobs.values():
+                for sink in job["sinks"]:
+                    sink.page_done()
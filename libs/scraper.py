@@ -1,9 +1,22 @@
 import os
 import sys
+import time
 from time import sleep
-from datetime import datetime
+from urllib.parse import urlparse, parse_qsl, urlencode
 
 from libs.web_scraping import WebScraping
+from libs.stub_server import save_fixture
+from libs.rate_limiter import AdaptiveRateLimiter
+from libs.timing import traced
+from libs.resource_blocking import get_blocked_urls
+from libs.property_data import (
+    PropertyRecord,
+    build_property_data,
+    get_account_key,
+    listing_to_raw_data,
+    get_missing_fields,
+    parse_search_payload,
+)
 
 
 # Paths
@@ -13,30 +26,82 @@ cookies_path = os.path.join(current_path, "cookies.pkl")
 
 class Scraper(WebScraping):
     
-    def __init__(self, page_link: str, headless: bool = False):
+    def __init__(self, page_link: str, headless: bool = False,
+                 capture_network: bool = False,
+                 rate_limiter: AdaptiveRateLimiter = None,
+                 block_resources: bool = False, blocked_urls: list = [],
+                 debugger_address: str = "", cookies_path: str = cookies_path):
         """ Initialize the scraper.
         
         Args:
             page_link (str): link to the page to scrape (with zoom and offset)
             headless (bool): run the browser in headless mode
+            capture_network (bool): save the search api responses
+                to read properties with get_captured_properties
+            rate_limiter (AdaptiveRateLimiter): control the time between
+                modals and pages (optional, fixed wait_seconds if None)
+            block_resources (bool): block images, fonts, map tiles and
+                analytics (see resource_blocking)
+            blocked_urls (list): other url patterns to block
+            debugger_address (str): attach to a running chrome with remote
+                debugging (host:port), see browser_daemon
+            cookies_path (str): file of the saved session, with the terms
+                of service accepted (default libs/cookies.pkl)
         """
         
         print("Starting scraper...")
         
+        # Resources of the site not used by the scraper
+        if block_resources:
+            blocked_urls = get_blocked_urls(page_link, blocked_urls)
+        
         super().__init__(
             headless=headless,
+            capture_network=capture_network,
+            block_images=block_resources,
+            blocked_urls=blocked_urls,
+            debugger_address=debugger_address,
         )
         
         # Global data
         self.global_selectors = {
-            "result": '.result-body > .ng-scope:not(div)'
+            "result": '.result-body > .ng-scope:not(div)',
+            "close_btn": '[ng-click="detailmodal.close()"]',
+            "pagination": 'ul.pagination',
+            "details_btn": '[ng-click="listing.openDetailModal()"]',
         }
         
-        # Load page
+        # Results by page and current results page
+        self.page_size = 10
+        self.current_page = 1
+        
+        # Search and details api urls (regex)
+        self.api_pattern = r"/api/property_sales/"
+        
+        # Max seconds to wait for each page state (results, modals, etc)
+        self.ready_time_out = 15
+        
+        # Adaptive wait between actions, with the site load times
+        self.rate_limiter = rate_limiter
+        
+        # Session file (loaded in new browsers and saved with the terms)
+        self.cookies_path = cookies_path
+        
+        # Load the saved session (terms accepted) in new browsers
+        # (attached browsers already have their own cookies)
+        if not debugger_address:
+            self.load_cookies(self.cookies_path)
+        
+        # Load page (attached browsers can be already in the page)
         self.page_link = page_link
-        self.set_page(page_link)
-        sleep(2)
-        self.refresh_selenium()
+        is_page_loaded = debugger_address \
+            and self.driver.current_url == page_link \
+            and self.is_visible(self.global_selectors["result"])
+        if is_page_loaded:
+            print("Reusing page loaded in the browser...")
+            self.current_page = self.get_current_page() or 1
+        else:
+            self.set_page(page_link)
         
         # Prepare the scraper
         self.__accept_terms__()
@@ -46,72 +111,60 @@ class Scraper(WebScraping):
         self.screenshot("page_loaded")
     
     def __accept_terms__(self):
-        """ Accept the terms of service. """
-        
-        print("Accepting terms of service...")
+        """ Accept the terms of service (if they are not accepted yet)
+        and save the session in the cookies file """
         
         selectors = {
             "btn_accept": '[ng-click="dm.agree()"]'
         }
+        
+        # Wait for the terms or the results (terms already accepted)
+        self.wait_until(
+            lambda: self.is_visible(selectors["btn_accept"])
+            or self.is_visible(self.global_selectors["result"]),
+            self.ready_time_out
+        )
+        if not self.is_visible(selectors["btn_accept"]):
+            print("Terms of service already accepted.")
+            return
+        
+        print("Accepting terms of service...")
         self.click_js(selectors["btn_accept"])
-        self.refresh_selenium()
+        self.wait_hidden(selectors["btn_accept"], self.ready_time_out)
+        self.save_cookies(self.cookies_path)
         
     def __wait_load_results__(self):
         """ Wait for the page to load. """
         
         print("Waiting for the page to load...")
         
-        # Wait for results to laod
+        # Wait for results to laod (3 times)
         for _ in range(3):
             
-            # Validate if results are loaded (3 times)
-            for _ in range(4):
-                results_num = self.get_elems(self.global_selectors["result"])
-                if len(results_num) > 0:
-                    return
-                sleep(2)
-                self.refresh_selenium()
+            # Validate if results are rendered and angular is idle
+            results_loaded = self.wait_visible(
+                self.global_selectors["result"],
+                self.ready_time_out
+            )
+            if results_loaded and self.wait_angular(self.ready_time_out):
+                return
                 
             # Reload page
             print("Error: Results not loaded. Reloading page...")
+            if self.rate_limiter:
+                self.rate_limiter.record_reload()
             self.driver.refresh()
-            sleep(2)
             self.__accept_terms__()
             
         # Raise error if no results
         print("Error: No results found. Try again later or use a different link.")
         sys.exit()
                 
-    def get_property_data(self) -> dict:
-        """ Extract data from current opened result
+    def __get_modal_raw_data__(self) -> dict:
+        """ Read the raw fields of the current opened result
         
         Returns:
-            list: property data gruoped
-                [
-                    {
-                        street (str): street address
-                        city (str): city
-                        state (str): state
-                        zip_code (str): zip code
-                        country (str): country
-                        maps_link (str): link to google maps
-                        sale_date (str): date of the sale
-                        status (str): status of the sale
-                        sale_type (str): type of sale
-                        date_pulled (str): date of the scraping
-                        sale_notes (str): notes of the sale
-                        judgment_date (str): date of the judgment
-                        adjudget_value (str): adjudget value
-                        es_min_bid (str): estimated minimum bid
-                        equity (str): equity
-                        equity_percent (str): equity percent
-                        account_number (str): account number
-                        case_number (str): case number
-                        case_style (str): case style
-                        link (str): link to the property,
-                        address_error (bool): if there was an error in the address
-                    }
-                ]
+            dict: raw fields (same keys as RAW_FIELDS)
         """
         
         selectors = {
@@ -130,69 +183,267 @@ class Scraper(WebScraping):
             'case_style': 'h3 + dl dd:nth-child(14)',
         }
         
-        raw_data = {}
-        for field, selector in selectors.items():
-            raw_data[field] = self.get_text(selector)
+        # Read all modal fields in a single call
+        return self.get_texts_map(selectors, {"maps_link": "href"})
+                
+    @traced("get_property_data")
+    def get_property_data(self) -> PropertyRecord:
+        """ Extract data from current opened result
+        
+        Returns:
+            PropertyRecord: property data (see build_property_data)
+        """
+        
+        raw_data = self.__get_modal_raw_data__()
+        return build_property_data(raw_data, self.page_link)
+    
+    def get_page_listings(self) -> list:
+        """ Read the angular listing data of all results in the current page
+        
+        Returns:
+            list: results rows
+                [
+                    {
+                        index (int): nth-child index of the row
+                        listing (dict): angular listing data (empty if not found)
+                        has_details (bool): if the row has the details button
+                    }
+                ]
+        """
+        
+        script = """
+        const rows = document.querySelectorAll(arguments[0]);
+        return Array.from(rows).map(row => {
+            const index = Array.prototype.indexOf.call(row.parentNode.children, row) + 1;
+            const scope = window.angular ? angular.element(row).scope() : null;
+            const listing = scope && scope.listing ? JSON.parse(angular.toJson(scope.listing)) : {};
+            const hasDetails = row.querySelector(arguments[1]) !== null;
+            return {index: index, listing: listing, has_details: hasDetails};
+        });
+        """
+        return self.driver.execute_script(
+            script,
+            self.global_selectors["result"],
+            self.global_selectors["details_btn"]
+        )
+    
+    def get_row_summaries(self) -> list:
+        """ Read a summary of all results rows in the current page
+        (with a single call to the browser)
+        
+        Returns:
+            list: results rows
+                [
+                    {
+                        index (int): nth-child index of the row
+                        account_number (str): account number (empty if
+                            the row has no angular listing)
+                        status (str): status of the sale
+                        sale_date (str): date of the sale
+                        has_details (bool): if the row has the details button
+                    }
+                ]
+        """
+        
+        summaries = []
+        for row in self.get_page_listings():
+            raw_data = listing_to_raw_data(row["listing"])
+            summaries.append({
+                "index": row["index"],
+                "account_number": raw_data["account_number"],
+                "status": raw_data["status"],
+                "sale_date": raw_data["sale_date"],
+                "has_details": row["has_details"],
+            })
+        return summaries
+    
+    def __is_skipped__(self, account_number: str, skip_accounts: set) -> bool:
+        """ Validate if a property must be skipped (like the properties
+        found in the input sheet)
+        
+        Args:
+            account_number (str): account number of the row
+            skip_accounts (set): account keys to skip (see get_account_key)
+        
+        Returns:
+            bool: True if the account is in skip_accounts
+        """
+        
+        if not account_number or not skip_accounts:
+            return False
+        
+        if get_account_key(account_number) in skip_accounts:
+            print(f"\t\tAccount number {account_number} found in input sheet. "
+                  "Skipping...")
+            return True
+        return False
+    
+    def get_page_properties(self, skip_accounts: set = set()) -> list:
+        """ Extract data of all results in the current page from angular scope.
+        Open the details modal only for rows with missing fields.
+        
+        Args:
+            skip_accounts (set): account keys to skip (see get_account_key)
+        
+        Returns:
+            list: properties data (see build_property_data)
+        """
+        
+        properties = []
+        for row in self.get_page_listings():
+            raw_data = listing_to_raw_data(row["listing"])
+            if self.__is_skipped__(raw_data["account_number"], skip_accounts):
+                continue
             
-        # Extract address data
-        try:
-            address_parts = raw_data["address"].split(",")
-            street = address_parts[0]
-            address_parts = address_parts[1].split("-")
-            address_parts = address_parts[0].strip().split()
-            postal_code = address_parts[-1]
-            state = address_parts[-2]
-            city = " ".join(address_parts[:-2])
-        except Exception:
-            print("\t\tError: Address format not recognized. Skipping property address.")
-            street = raw_data["address"]
-            city = ""
-            state = ""
-            postal_code = ""
-        
-        # Get google maps link
-        maps_link = self.get_attrib(selectors["maps_link"], "href")
-        
-        # Calculate equity and fix quantities
-        if not raw_data["adjudget_value"]:
-            raw_data["adjudget_value"] = "$0"
-        if not raw_data["es_min_bid"]:
-            raw_data["es_min_bid"] = "$0"
-        adjudget_value_str = raw_data["adjudget_value"].replace("$", "").replace(",", "")
-        es_min_bid_str = raw_data["es_min_bid"].replace("$", "").replace(",", "")
-        adjudget_value = float(adjudget_value_str)
-        es_min_bid = float(es_min_bid_str)
-        equity = adjudget_value - es_min_bid
-        equity_percent = 0
-        if adjudget_value > 0:
-            equity_percent = int(equity / adjudget_value * 10000) / 100
+            # Read from details modal the fields not found in angular scope
+            missing_fields = get_missing_fields(raw_data, row["listing"])
+            if missing_fields:
+                if not self.open_property_details(row["index"]):
+                    continue
+                modal_data = self.__get_modal_raw_data__()
+                for field in missing_fields:
+                    raw_data[field] = modal_data[field]
+                self.close_property_details()
             
-        today = datetime.now().strftime("%m/%d/%Y")
-        
-        return {
-            "street": street,
-            "city": city,
-            "state": state,
-            "zip_code": postal_code,
-            "country": raw_data["country"],
-            "maps_link": maps_link,
-            "sale_date": raw_data["sale_date"],
-            "status": raw_data["status"],
-            "sale_type": raw_data["sale_type"],
-            "date_pulled": today,
-            "sale_notes": raw_data["sale_notes"],
-            "judgment_date": raw_data["judgment_date"],
-            "adjudget_value": f"${adjudget_value}",
-            "es_min_bid": f"${es_min_bid}",
-            "equity": f"${equity}",
-            "equity_percent": f"{equity_percent}%",
-            "account_number": raw_data["account_number"],
-            "case_number": raw_data["cause_number"],
-            "case_style": raw_data["case_style"],
-            "link": self.page_link,
-            "address_error": not bool(city),
-        }
+            properties.append(build_property_data(raw_data, self.page_link))
+        
+        return properties
+    
+    def __discard_captures__(self):
+        """ Discard the api responses captured and not read yet (before
+        load other page, so they are not returned with the next page)
+        """
+        
+        if self.__capture_network__:
+            self.get_network_responses(self.api_pattern)
     
+    def __is_current_page_response__(self, url: str) -> bool:
+        """ Validate if a captured search response is of the current page
+        (responses without offset, like details, are accepted)
+        
+        Args:
+            url (str): url of the request
+        
+        Returns:
+            bool: True if the offset of the url is of the current page
+        """
+        
+        params = dict(parse_qsl(urlparse(url).query))
+        if "offset" not in params:
+            return True
+        try:
+            limit = int(params.get("limit", self.page_size)) or self.page_size
+            return int(params["offset"]) // limit + 1 == self.current_page
+        except ValueError:
+            return True
+    
+    def get_captured_properties(self, fixtures_folder: str = "") -> list:
+        """ Extract data of the properties from the api responses captured
+        since the last call (require capture_network=True). Search responses
+        of other pages are skipped
+        
+        Args:
+            fixtures_folder (str): folder to save the json responses
+                as fixtures for the stub server (optional)
+        
+        Returns:
+            list: properties data (see build_property_data)
+        """
+        
+        properties = []
+        accounts = set()
+        for response in self.get_network_responses(self.api_pattern):
+            
+            if fixtures_folder:
+                save_fixture(fixtures_folder, response["url"], response["data"])
+            
+            if not self.__is_current_page_response__(response["url"]):
+                continue
+            
+            for listing in parse_search_payload(response["data"]):
+                raw_data = listing_to_raw_data(listing)
+                
+                # Skip duplicated listings (search and details responses)
+                if raw_data["account_number"] in accounts:
+                    continue
+                accounts.add(raw_data["account_number"])
+                
+                properties.append(build_property_data(raw_data, self.page_link))
+                
+        return properties
+
+    def iter_page_properties(self, fast_mode: bool = False, wait_seconds: int = 0,
+                             fixtures_folder: str = "", skip_accounts: set = set()):
+        """ Extract data of each property in the current page, with the fastest
+        mode available: api responses (capture_network), angular scope
+        (fast_mode) or details modals
+
+        Args:
+            fast_mode (bool): read properties from angular scope
+            wait_seconds (int): seconds to wait after each modal
+                (or after the page in fast modes), if there is no rate_limiter
+            fixtures_folder (str): folder to save the captured json responses
+            skip_accounts (set): account keys to skip before open their
+                details (see get_account_key)
+
+        Yields:
+            PropertyRecord: property data (see build_property_data)
+        """
+
+        # Extract all properties of the page from the api responses
+        # or from angular scope
+        if self.__capture_network__ or fast_mode:
+            page_properties = []
+            if self.__capture_network__:
+                page_properties = [
+                    data for data in self.get_captured_properties(fixtures_folder)
+                    if not self.__is_skipped__(data.account_number, skip_accounts)
+                ]
+            if not page_properties:
+                page_properties = self.get_page_properties(skip_accounts)
+                
+                # Details responses of the modals are not of the next page
+                self.__discard_captures__()
+
+            yield from page_properties
+            self.__wait_next_action__(wait_seconds)
+            return
+
+        # Extract the properties from current results page, one modal at time
+        # (rows without details or skipped are not opened)
+        for row in self.get_row_summaries():
+            if not row["has_details"]:
+                continue
+            if self.__is_skipped__(row["account_number"], skip_accounts):
+                continue
+
+            # Open property details
+            property_found = self.open_property_details(row["index"])
+            if not property_found:
+                continue
+
+            # Extract property data and close details
+            data = self.get_property_data()
+            self.close_property_details()
+            if data:
+                yield data
+
+            self.__wait_next_action__(wait_seconds)
+
+    def __wait_next_action__(self, wait_seconds: int = 0):
+        """ Wait before the next modal or page, with the rate limiter
+        or with a fixed time
+
+        Args:
+            wait_seconds (int): seconds to wait if there is no rate_limiter
+        """
+
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        else:
+            sleep(wait_seconds)
+
+    @traced("open_property_details")
     def open_property_details(self, property_index: int) -> bool:
         """ Open the details of a property.
 
@@ -203,37 +454,185 @@ class Scraper(WebScraping):
             bool: True if the property was found and opened, False otherwise
         """
         
-        selectors = {
-            "detals_btn": '[ng-click="listing.openDetailModal()"]',
-        }
-        
         # generate selectors
-        row_selector = f"{self.global_selectors["result"]}:nth-child({property_index})"
-        row_details_btn = f"{row_selector} {selectors['detals_btn']}"
+        row_selector = f"{self.global_selectors['result']}:nth-child({property_index})"
+        row_details_btn = f"{row_selector} {self.global_selectors['details_btn']}"
         is_row_details = self.get_elems(row_details_btn)
         
         # Validate if row is a link
         if not is_row_details:
             return False
         
-        # Open details
+        # Open details and wait for its data
+        start = time.perf_counter()
         self.click_js(row_details_btn)
-        sleep(1)
-        self.refresh_selenium()
+        modal_open = self.wait_modal_open(
+            self.global_selectors["close_btn"],
+            self.ready_time_out
+        )
+        if not modal_open:
+            print("\t\tError: Property details not loaded in time.")
+        
+        # Report the load time (or the error) to adjust the wait time
+        if self.rate_limiter:
+            if modal_open:
+                self.rate_limiter.record_success(time.perf_counter() - start,
+                                                 "modal")
+            else:
+                self.rate_limiter.record_error()
         
         return True
     
+    @traced("close_property_details")
     def close_property_details(self):
         """ Close the details of a property. """
         
-        selectors = {
-            "close_btn": '[ng-click="detailmodal.close()"]',
+        # Close details tab
+        self.click_js(self.global_selectors["close_btn"])
+        self.wait_modal_close(
+            self.global_selectors["close_btn"],
+            self.ready_time_out
+        )
+        
+    def get_current_page(self) -> int:
+        """ Read the active page of the angular pagination
+        
+        Returns:
+            int: page number (None if the pagination is not found)
+        """
+        
+        script = """
+        const pagination = document.querySelector(arguments[0]);
+        if (!pagination) return null;
+        if (window.angular) {
+            const element = angular.element(pagination);
+            const scope = (element.isolateScope && element.isolateScope()) || element.scope();
+            if (scope && scope.page) return Number(scope.page);
+        }
+        const active = pagination.querySelector("li.active");
+        const page = active ? parseInt(active.textContent, 10) : NaN;
+        return isNaN(page) ? null : page;
+        """
+        return self.driver.execute_script(script, self.global_selectors["pagination"])
+    
+    def get_page_link(self, page_num: int) -> str:
+        """ Return the link of a results page (offset param of the page
+        link, or page param if there is no offset)
+        
+        Args:
+            page_num (int): number of the page (from 1)
+        
+        Returns:
+            str: link of the page
+        """
+        
+        parsed_link = urlparse(self.page_link)
+        params = dict(parse_qsl(parsed_link.query, keep_blank_values=True))
+        if "offset" in params:
+            params["offset"] = (page_num - 1) * self.page_size
+        else:
+            params["page"] = page_num
+        return parsed_link._replace(query=urlencode(params)).geturl()
+    
+    def __select_page__(self, page_num: int):
+        """ Change the page with the angular pagination controller
+        (selectPage of the pagination directive scope)
+        
+        Args:
+            page_num (int): number of the page (from 1)
+        
+        Returns:
+            bool: True if the page was selected, False if it is out of
+                the pages range (None if there is no pagination controller)
+        """
+        
+        script = """
+        const pagination = document.querySelector(arguments[0]);
+        const page = arguments[1];
+        if (!pagination || !window.angular) return null;
+        const element = angular.element(pagination);
+        const scope = (element.isolateScope && element.isolateScope()) || element.scope();
+        if (!scope || typeof scope.selectPage !== "function") return null;
+        if (scope.totalPages && page > scope.totalPages) return false;
+        if (scope.$apply) {
+            scope.$apply(function () { scope.selectPage(page); });
+        } else {
+            scope.selectPage(page);
         }
+        return true;
+        """
+        return self.driver.execute_script(
+            script,
+            self.global_selectors["pagination"],
+            page_num
+        )
+    
+    @traced("go_to_page")
+    def go_to_page(self, page_num: int) -> bool:
+        """ Go directly to a results page: with the angular pagination
+        controller, with the page link, or clicking next as last option
+        
+        Args:
+            page_num (int): number of the page (from 1)
+        
+        Returns:
+            bool: True if the page is loaded, False if it does not exist
+        """
+        
+        if page_num == self.current_page:
+            return True
+        
+        print(f"Going to page {page_num}...")
+        self.__discard_captures__()
+        
+        # Select the page in the angular pagination (without reload)
+        first_result = self.get_text(self.global_selectors["result"])
+        selected = self.__select_page__(page_num)
+        if selected is False:
+            return False
+        if selected:
+            self.wait_until(
+                lambda: self.get_text(self.global_selectors["result"]) != first_result,
+                self.ready_time_out
+            )
+            self.__wait_load_results__()
+            self.current_page = self.get_current_page() or self.current_page
+            if self.current_page == page_num:
+                return True
+
+        # Load the link of the page (if the site reads the page from the url)
+        if selected is None:
+            self.set_page(self.get_page_link(page_num))
+            self.__accept_terms__()
+            results_loaded = self.wait_visible(
+                self.global_selectors["result"],
+                self.ready_time_out
+            )
+            if results_loaded and self.get_current_page() == page_num:
+                self.wait_angular(self.ready_time_out)
+                self.current_page = page_num
+                return True
             
-        # Close details tab
-        self.click_js(selectors["close_btn"])
-        self.refresh_selenium()
+            # Page not found in the url: start again from the first page
+            self.set_page(self.page_link)
+            self.__accept_terms__()
+            self.__wait_load_results__()
+            self.current_page = self.get_current_page() or 1
         
+        # Click next page until the page is reached
+        if page_num < self.current_page:
+            self.set_page(self.page_link)
+            self.__accept_terms__()
+            self.__wait_load_results__()
+            self.current_page = 1
+        # (each page discards the captures of the previous one, so only
+        # the responses of the target page are kept)
+        while self.current_page < page_num:
+            if not self.go_next_page():
+                return False
+        return True
+    
+    @traced("go_next_page")
     def go_next_page(self) -> bool:
         """ Validate if there is a next page and go to it."""
         
@@ -244,9 +643,26 @@ class Scraper(WebScraping):
         is_next = self.get_elems(selectors["next"])
         if not is_next:
             return False
+        self.__discard_captures__()
+        
+        # Save first result to detect when the page changes
+        first_result = self.get_text(self.global_selectors["result"])
     
+        start = time.perf_counter()
         self.click_js(selectors["next"])
-        self.refresh_selenium()
+        page_changed = self.wait_until(
+            lambda: self.get_text(self.global_selectors["result"]) != first_result,
+            self.ready_time_out
+        )
         self.__wait_load_results__()
+        self.current_page += 1
+        
+        # Report the page load time (or the error) to adjust the wait time
+        if self.rate_limiter:
+            if page_changed:
+                self.rate_limiter.record_success(time.perf_counter() - start,
+                                                 "page")
+            else:
+                self.rate_limiter.record_error()
         
         return True
\ No newline at end of file
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import mimetypes
+import threading
+from urllib.parse import urlparse, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def get_fixture_path(fixtures_folder: str, url: str) -> str:
+    """ Return the local file of a recorded json response
+
+    Args:
+        fixtures_folder (str): folder with the fixtures
+        url (str): url (or path) of the request
+
+    Returns:
+        str: path to the json file
+            <folder>/<url path>/index.json for requests without query
+            <folder>/<url path>/<query hash>.json for requests with query
+    """
+
+    parsed_url = urlparse(url)
+    path_parts = [part for part in parsed_url.path.split("/") if part]
+
+    file_name = "index.json"
+    if parsed_url.query:
+        query = "&".join(sorted(parsed_url.query.split("&")))
+        file_name = hashlib.sha1(query.encode()).hexdigest()[:12] + ".json"
+
+    return os.path.join(fixtures_folder, *path_parts, file_name)
+
+
+def save_fixture(fixtures_folder: str, url: str, data):
+    """ Save a json response as fixture for the stub server
+
+    Args:
+        fixtures_folder (str): folder with the fixtures
+        url (str): url of the request
+        data (dict or list): json body of the response
+    """
+
+    fixture_path = get_fixture_path(fixtures_folder, url)
+    os.makedirs(os.path.dirname(fixture_path), exist_ok=True)
+    with open(fixture_path, "w") as file:
+        json.dump(data, file, indent=4)
+
+
+class StubServer():
+    """ Local http server that replays recorded json responses and static files.
+    Paginated fixtures ({"results": [...]}) saved without query are sliced
+    with the "offset" and "limit" params of each request.
+    """
+
+    def __init__(self, fixtures_folder: str, host: str = "127.0.0.1",
+                 port: int = 0, latency: float = 0):
+        """ Save settings of the server
+
+        Args:
+            fixtures_folder (str): folder with the fixtures
+            host (str): host to listen
+            port (int): port to listen (0 to use a free port)
+            latency (float): seconds to wait before each response
+        """
+
+        self.fixtures_folder = fixtures_folder
+        self.latency = latency
+        self.requests = []
+
+        handler = self.__get_handler__()
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        """ Url of the running server """
+
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __get_handler__(self):
+        """ Create the request handler class linked to the server """
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                server.requests.append(self.path)
+                if server.latency:
+                    time.sleep(server.latency)
+
+                status, content_type, body = server.get_response(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def get_response(self, url: str) -> tuple:
+        """ Find the fixture of a request
+
+        Args:
+            url (str): path and query of the request
+
+        Returns:
+            tuple: status code, content type and body (bytes)
+        """
+
+        parsed_url = urlparse(url)
+
+        # Static files (html, js, css, etc)
+        static_path = os.path.join(
+            self.fixtures_folder,
+            *[part for part in parsed_url.path.split("/") if part]
+        )
+        if os.path.isdir(static_path):
+            static_path = os.path.join(static_path, "index.html")
+        if os.path.isfile(static_path):
+            content_type = mimetypes.guess_type(static_path)[0]
+            with open(static_path, "rb") as file:
+                return 200, content_type or "text/plain", file.read()
+
+        # Recorded response of the exact request
+        fixture_path = get_fixture_path(self.fixtures_folder, url)
+        if os.path.isfile(fixture_path):
+            with open(fixture_path) as file:
+                return 200, "application/json", file.read().encode()
+
+        # Full response without query, paginated locally
+        fixture_path = get_fixture_path(self.fixtures_folder, parsed_url.path)
+        if os.path.isfile(fixture_path):
+            with open(fixture_path) as file:
+                data = json.load(file)
+            params = dict(parse_qsl(parsed_url.query))
+            data = self.__paginate__(data, params, parsed_url.path)
+            return 200, "application/json", json.dumps(data).encode()
+
+        return 404, "application/json", b'{"detail": "Not found."}'
+
+    def __paginate__(self, data, params: dict, path: str):
+        """ Slice paginated results with the offset and limit params
+
+        Args:
+            data (dict or list): full json response
+            params (dict): query params of the request
+            path (str): path of the request
+
+        Returns:
+            dict or list: json response with the requested page
+        """
+
+        if not isinstance(data, dict) or not isinstance(data.get("results"), list):
+            return data
+
+        results = data["results"]
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", len(results) or 1))
+
+        next_link = None
+        if offset + limit < len(results):
+            next_params = dict(params, offset=offset + limit, limit=limit)
+            query = "&".join(f"{key}={value}" for key, value in next_params.items())
+            next_link = f"{self.base_url}{path}?{query}"
+
+        page = dict(data)
+        page["count"] = len(results)
+        page["next"] = next_link
+        page["results"] = results[offset:offset + limit]
+        return page
+
+    def start(self) -> str:
+        """ Start the server in a background thread
+
+        Returns:
+            str: url of the server
+        """
+
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        """ Stop the server and close its socket """
+
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Serve recorded fixtures")
+    parser.add_argument("fixtures_folder", help="folder with the fixtures")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0)
+    args = parser.parse_args()
+
+    stub_server = StubServer(args.fixtures_folder, port=args.port,
+                             latency=args.latency)
+    print(f"Serving '{args.fixtures_folder}' in {stub_server.base_url}")
+    stub_server.httpd.serve_forever()
@@ -0,0 +1,202 @@
+import os
+import json
+import math
+import time
+import threading
+import functools
+
+
+class Tracer():
+    """ Save the duration of the traced stages in a JSONL file and print
+    a periodic summary. When it is disabled the traced functions only
+    check a flag
+    """
+
+    def __init__(self):
+        """ Construtor of the class (disabled until configure is called) """
+
+        self.enabled = False
+        self.trace_file = None
+        self.summary_seconds = 0
+        self.lock = threading.Lock()
+        self.__reset__()
+
+    def __reset__(self):
+        """ Clear the saved durations and counters """
+
+        # Durations by stage: {stage (str): [seconds (float)]}
+        self.durations = {}
+        self.properties = 0
+        self.start_time = time.monotonic()
+        self.last_summary = self.start_time
+
+    def configure(self, trace_path: str = "", summary_seconds: int = 300):
+        """ Enable the tracing
+
+        Args:
+            trace_path (str): path of the JSONL trace file (appended),
+                tracing is disabled if empty
+            summary_seconds (int): seconds between summaries (0 to disable)
+        """
+
+        self.close()
+        self.__reset__()
+        self.summary_seconds = summary_seconds
+        if trace_path:
+            self.trace_file = open(trace_path, "a", encoding="utf-8")
+            self.enabled = True
+
+    def record(self, stage: str, start: float, seconds: float):
+        """ Save the duration of a stage
+
+        Args:
+            stage (str): name of the stage
+            start (float): start time (epoch seconds)
+            seconds (float): duration in seconds
+        """
+
+        line = json.dumps({
+            "stage": stage,
+            "start": round(start, 6),
+            "seconds": round(seconds, 6),
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+        })
+        with self.lock:
+            if not self.trace_file:
+                return
+            self.durations.setdefault(stage, []).append(seconds)
+            self.trace_file.write(line + "\n")
+            self.trace_file.flush()
+        self.__summary_if_due__()
+
+    def count_property(self):
+        """ Count a property scraped (for the properties by minute) """
+
+        if not self.enabled:
+            return
+        with self.lock:
+            self.properties += 1
+        self.__summary_if_due__()
+
+    def get_summary(self) -> dict:
+        """ Return the percentiles of each stage and the properties by minute
+
+        Returns:
+            dict: summary
+                {
+                    properties (int): properties scraped
+                    properties_per_minute (float): properties by minute
+                    stages (dict): {stage (str): {calls, total, p50, p95, p99}}
+                }
+        """
+
+        with self.lock:
+            durations = {stage: sorted(values)
+                         for stage, values in self.durations.items()}
+            properties = self.properties
+
+        stages = {}
+        for stage, values in durations.items():
+            stages[stage] = {
+                "calls": len(values),
+                "total": round(sum(values), 3),
+                "p50": round(get_percentile(values, 50), 3),
+                "p95": round(get_percentile(values, 95), 3),
+                "p99": round(get_percentile(values, 99), 3),
+            }
+
+        minutes = (time.monotonic() - self.start_time) / 60
+        return {
+            "properties": properties,
+            "properties_per_minute": round(properties / minutes, 2) if minutes else 0,
+            "stages": stages,
+        }
+
+    def print_summary(self):
+        """ Print the summary and save it in the trace file """
+
+        summary = self.get_summary()
+        print("\n\tTiming summary "
+              f"({summary['properties']} properties, "
+              f"{summary['properties_per_minute']} by minute):")
+        for stage, stage_summary in summary["stages"].items():
+            print(f"\t\t{stage}: {stage_summary}")
+
+        with self.lock:
+            if not self.trace_file:
+                return
+            line = json.dumps({"summary": summary, "pid": os.getpid()})
+            self.trace_file.write(line + "\n")
+            self.trace_file.flush()
+
+    def __summary_if_due__(self):
+        """ Print the summary each summary_seconds """
+
+        if not self.summary_seconds:
+            return
+
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_summary < self.summary_seconds:
+                return
+            self.last_summary = now
+        self.print_summary()
+
+    def close(self):
+        """ Print the last summary and close the trace file """
+
+        if not self.enabled:
+            return
+
+        self.print_summary()
+        self.enabled = False
+        self.trace_file.close()
+        self.trace_file = None
+
+
+def get_percentile(values: list, percentile: float) -> float:
+    """ Return the percentile of sorted values (nearest rank)
+
+    Args:
+        values (list): sorted values
+        percentile (float): percentile from 0 to 100
+
+    Returns:
+        float: value of the percentile (0 if there are no values)
+    """
+
+    if not values:
+        return 0
+    rank = max(1, math.ceil(percentile / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+# Tracer of the process (configured in the main script)
+tracer = Tracer()
+
+
+def traced(stage: str):
+    """ Decorator to save the duration of each call of a function
+
+    Args:
+        stage (str): name of the stage in the trace
+    """
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+
+            start = time.time()
+            start_counter = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                tracer.record(stage, start, time.perf_counter() - start_counter)
+
+        return wrapper
+
+    return decorator
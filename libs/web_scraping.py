@@ -1,5 +1,8 @@
 import os
+import re
+import json
 import time
+import pickle
 import zipfile
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -8,15 +11,14 @@ from selenium.webdriver.support.ui import Select
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.remote.webelement import WebElement
 
+from libs.timing import traced
+
 current_file = os.path.basename(__file__)
 
 
 class WebScraping ():
     """ Class to manage and configure web browser
     """
-    
-    service = None
-    options = None
 
     def __init__(self, headless: bool = False, time_out: int = 0,
                  proxy_server: str = "", proxy_port: str = "",
@@ -25,7 +27,9 @@ class WebScraping ():
                  download_folder: str = "", extensions: list = [],
                  incognito: bool = False, experimentals: bool = True,
                  start_killing: bool = False, start_openning: bool = True,
-                 mute: bool = True, auto_chrome_folder_windows: bool = False):
+                 mute: bool = True, auto_chrome_folder_windows: bool = False,
+                 capture_network: bool = False, block_images: bool = False,
+                 blocked_urls: list = [], debugger_address: str = ""):
         
         """ Save settings and create a new instance of the web browser
 
@@ -45,6 +49,14 @@ class WebScraping ():
             start_killing (bool, optional): Kill chrome when starts. Defaults to False.
             start_openning (bool, optional): Open chrome before starts. Defaults to True.
             mute (bool, optional): Mute the audio of the window. Defaults to True.
+            capture_network (bool, optional): Save network logs to read
+                responses with get_network_responses. Defaults to False.
+            block_images (bool, optional): Disable images. Defaults to False.
+            blocked_urls (list, optional): Url patterns to block ("*" as
+                wildcard). Defaults to [].
+            debugger_address (str, optional): Attach to a running chrome
+                with remote debugging (host:port) instead of open a new one.
+                Defaults to "".
         """
 
         self.basetime = 1
@@ -65,9 +77,18 @@ class WebScraping ():
         self.__experimentals__ = experimentals
         self.__start_openning__ = start_openning
         self.__mute__ = mute
+        self.__capture_network__ = capture_network
+        self.__block_images__ = block_images
+        self.__blocked_urls__ = blocked_urls
+        self.__debugger_address__ = debugger_address
         
         self.__web_page__ = None
         
+        # Captured responses waiting for its body (request id: url)
+        # and the ones already loaded (body ready to read)
+        self.__network_pending__ = {}
+        self.__network_finished__ = set()
+        
         # Fix chrome folder
         if auto_chrome_folder_windows:
             username = os.getlogin()
@@ -127,112 +148,260 @@ class WebScraping ():
         os.environ['WDM_LOG_LEVEL'] = '0'
         os.environ['WDM_PRINT_FIRST_LINE'] = 'False'
 
-        # Configure browser
-        if not WebScraping.options:
-            WebScraping.options = webdriver.ChromeOptions()
-            options_elems = [
-                '--no-sandbox',
-                '--start-maximized',
-                '--output=/dev/null',
-                '--log-level=3',
-                '--disable-notifications',
-                '--disable-infobars',
-                '--safebrowsing-disable-download-protection',
-                '--disable-dev-shm-usage',
-                '--disable-renderer-backgrounding',
-                '--disable-background-timer-throttling',
-                '--disable-backgrounding-occluded-windows',
-                '--disable-client-side-phishing-detection',
-                '--disable-crash-reporter',
-                '--disable-oopr-debug-crash-dump',
-                '--no-crash-upload',
-                '--disable-gpu',
-                '--disable-extensions',
-                '--disable-low-res-tiling',
-                '--silent'
-            ]
+        # Attach to a running browser (its flags are set when it starts)
+        if self.__debugger_address__:
+            self.__attach_browser_instance__()
+            return
+
+        # Configure browser (one options instance per browser)
+        self.options = webdriver.ChromeOptions()
+        options_elems = [
+            '--no-sandbox',
+            '--start-maximized',
+            '--output=/dev/null',
+            '--log-level=3',
+            '--disable-notifications',
+            '--disable-infobars',
+            '--safebrowsing-disable-download-protection',
+            '--disable-dev-shm-usage',
+            '--disable-renderer-backgrounding',
+            '--disable-background-timer-throttling',
+            '--disable-backgrounding-occluded-windows',
+            '--disable-client-side-phishing-detection',
+            '--disable-crash-reporter',
+            '--disable-oopr-debug-crash-dump',
+            '--no-crash-upload',
+            '--disable-gpu',
+            '--disable-extensions',
+            '--disable-low-res-tiling',
+            '--silent'
+        ]
+        
+        for option in options_elems:
+            self.options.add_argument(option)
+        
+        # Experimentals
+        if self.__experimentals__:
+            self.options.add_experimental_option(
+                'excludeSwitches', ['enable-logging', "enable-automation"])
+            self.options.add_experimental_option(
+                'useAutomationExtension',
+                False
+            )
+        
+        # headless mode
+        if self.__headless__:
+            self.options.add_argument("--headless=new")
             
-            for option in options_elems:
-                WebScraping.options.add_argument(option)
+        if self.__mute__:
+            self.options.add_argument("--mute-audio")
             
-            # Experimentals
-            if self.__experimentals__:
-                WebScraping.options.add_experimental_option(
-                    'excludeSwitches', ['enable-logging', "enable-automation"])
-                WebScraping.options.add_experimental_option(
-                    'useAutomationExtension',
-                    False
-                )
+        # Set chrome folder
+        if self.__chrome_folder__:
+            chrome_folder_option = f"--user-data-dir={self.__chrome_folder__}"
+            self.options.add_argument(chrome_folder_option)
+
+        # Set default user agent
+        if self.__user_agent__:
+            self.options.add_argument(f'--user-agent={self.__user_agent__}')
+
+        prefs = {}
+        if self.__download_folder__:
+            prefs.update({
+                'download.default_directory': f'{self.__download_folder__}',
+                'download.prompt_for_download': 'false',
+                'profile.default_content_setting_values.automatic_downloads': 1,
+                'profile.default_content_settings.popups': 0,
+                'download.directory_upgrade': True,
+                'plugins.always_open_pdf_externally': True,
+                'plugins.plugins_list': [
+                    {
+                        'enabled': False,
+                        'name': 'Chrome PDF Viewer'
+                    }
+                ],
+                'download.extensions_to_open': 'xml',
+                'safebrowsing.enabled': True
+            })
+
+        # Disable images
+        if self.__block_images__:
+            prefs['profile.managed_default_content_settings.images'] = 2
+            self.options.add_argument('--blink-settings=imagesEnabled=false')
+
+        if prefs:
+            self.options.add_experimental_option('prefs', prefs)
+
+        if self.__extensions__:
+            for extension in self.__extensions__:
+                self.options.add_extension(extension)
+
+        if self.__incognito__:
+            self.options.add_argument("--incognito")
+
+        if self.__experimentals__:
+            self.options.add_argument(
+                "--disable-blink-features=AutomationControlled"
+            )
             
-            # headless mode
-            if self.__headless__:
-                WebScraping.options.add_argument("--headless=new")
-                
-            if self.__mute__:
-                WebScraping.options.add_argument("--mute-audio")
-                
-            # Set chrome folder
-            if self.__chrome_folder__:
-                chrome_folder_option = f"--user-data-dir={self.__chrome_folder__}"
-                WebScraping.options.add_argument(chrome_folder_option)
-
-            # Set default user agent
-            if self.__user_agent__:
-                WebScraping.options.add_argument(f'--user-agent={self.__user_agent__}')
-
-            if self.__download_folder__:
-                prefs = {
-                    'download.default_directory': f'{self.__download_folder__}',
-                    'download.prompt_for_download': 'false',
-                    'profile.default_content_setting_values.automatic_downloads': 1,
-                    'profile.default_content_settings.popups': 0,
-                    'download.directory_upgrade': True,
-                    'plugins.always_open_pdf_externally': True,
-                    'plugins.plugins_list': [
-                        {
-                            'enabled': False,
-                            'name': 'Chrome PDF Viewer'
-                        }
-                    ],
-                    'download.extensions_to_open': 'xml',
-                    'safebrowsing.enabled': True
-                }
-
-                WebScraping.options.add_experimental_option('prefs', prefs)
-
-            if self.__extensions__:
-                for extension in self.__extensions__:
-                    WebScraping.options.add_extension(extension)
-
-            if self.__incognito__:
-                WebScraping.options.add_argument("--incognito")
-
-            if self.__experimentals__:
-                WebScraping.options.add_argument(
-                    "--disable-blink-features=AutomationControlled"
-                )
-        
+        # Save network events in performance logs
+        if self.__capture_network__:
+            self.options.set_capability(
+                "goog:loggingPrefs",
+                {"performance": "ALL"}
+            )
+    
         # Setup proxy
         if self.__proxy_server__ and self.__proxy_port__:
             
             # Setup user and password proxy
             if self.__proxy_user__ and self.__proxy_pass__:
                 self.__create_proxy_extension__()
-                WebScraping.options.add_extension(self.__pluginfile__)
+                self.options.add_extension(self.__pluginfile__)
                 
             # Setup basic proxy
             else:
                 proxy = f"{self.__proxy_server__}:{self.__proxy_port__}"
-                WebScraping.options.add_argument(f"--proxy-server={proxy}")
+                self.options.add_argument(f"--proxy-server={proxy}")
 
         # Autoinstall driver with selenium
-        if not WebScraping.service:
-            WebScraping.service = Service()
+        self.service = Service()
           
         # Auto download driver
         self.driver = webdriver.Chrome(
-            service=WebScraping.service,
-            options=WebScraping.options
+            service=self.service,
+            options=self.options
+        )
+
+        # Block requests of resources not used
+        if self.__blocked_urls__:
+            self.set_blocked_urls(self.__blocked_urls__)
+
+    def __attach_browser_instance__(self):
+        """ Connect to a running browser with remote debugging
+        (like the one of browser_daemon), keeping its session and cookies
+        """
+
+        self.options = webdriver.ChromeOptions()
+        self.options.add_experimental_option(
+            "debuggerAddress",
+            self.__debugger_address__
+        )
+
+        # Save network events in performance logs
+        if self.__capture_network__:
+            self.options.set_capability(
+                "goog:loggingPrefs",
+                {"performance": "ALL"}
+            )
+
+        self.service = Service()
+        self.driver = webdriver.Chrome(
+            service=self.service,
+            options=self.options
+        )
+
+        # Images prefs are set when the browser starts: block them by url
+        blocked_urls = list(self.__blocked_urls__)
+        if self.__block_images__:
+            blocked_urls += ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp"]
+        self.set_blocked_urls(blocked_urls)
+
+    def save_cookies(self, cookies_path: str):
+        """ Save the cookies and the local storage of the current page
+        in a pickle file
+
+        Args:
+            cookies_path (str): path of the pickle file
+        """
+
+        script = """
+        const items = {};
+        for (let i = 0; i < localStorage.length; i++) {
+            const key = localStorage.key(i);
+            items[key] = localStorage.getItem(key);
+        }
+        return {origin: location.origin, items: items};
+        """
+        local_storage = self.driver.execute_script(script)
+
+        session = {
+            "cookies": self.driver.get_cookies(),
+            "local_storage": local_storage,
+        }
+        # Replace the file at once (other browsers can be reading it)
+        temp_path = f"{cookies_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as cookies_file:
+            pickle.dump(session, cookies_file)
+        os.replace(temp_path, cookies_path)
+
+    def load_cookies(self, cookies_path: str) -> bool:
+        """ Load the cookies and local storage of a pickle file
+        (see save_cookies) with the chrome devtools protocol, so they are
+        ready before open the page of its domain
+
+        Args:
+            cookies_path (str): path of the pickle file
+
+        Returns:
+            bool: True if the data was loaded
+        """
+
+        if not os.path.isfile(cookies_path):
+            return False
+
+        try:
+            with open(cookies_path, "rb") as cookies_file:
+                session = pickle.load(cookies_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+
+        # Set cookies
+        for cookie in session["cookies"]:
+            cdp_cookie = {
+                key: cookie[key]
+                for key in ["name", "value", "domain", "path", "secure",
+                            "httpOnly", "sameSite"]
+                if key in cookie
+            }
+            if "expiry" in cookie:
+                cdp_cookie["expires"] = cookie["expiry"]
+            self.driver.execute_cdp_cmd("Network.setCookie", cdp_cookie)
+
+        # Set local storage items before the scripts of the page run
+        local_storage = session["local_storage"]
+        if local_storage["items"]:
+            script = """
+            if (location.origin === %s) {
+                const items = %s;
+                for (const key in items) {
+                    if (localStorage.getItem(key) === null) {
+                        localStorage.setItem(key, items[key]);
+                    }
+                }
+            }
+            """ % (json.dumps(local_storage["origin"]),
+                   json.dumps(local_storage["items"]))
+            self.driver.execute_cdp_cmd(
+                "Page.addScriptToEvaluateOnNewDocument",
+                {"source": script}
+            )
+
+        return True
+
+    def set_blocked_urls(self, blocked_urls: list):
+        """ Block the requests of the urls (images, fonts, analytics, etc)
+        with the chrome devtools protocol
+
+        Args:
+            blocked_urls (list): url patterns, with "*" as wildcard
+                (empty list to unblock all)
+        """
+
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.execute_cdp_cmd(
+            "Network.setBlockedURLs",
+            {"urls": blocked_urls}
         )
 
     def __create_proxy_extesion__(self):
@@ -340,8 +509,13 @@ class WebScraping ():
 
     def end_browser(self):
         """ End current instance of web browser
+        (attached browsers keep running, only the driver is stopped)
         """
 
+        if self.__debugger_address__:
+            self.service.stop()
+            return
+
         self.driver.quit()
 
     def __reload_browser__(self):
@@ -430,6 +604,146 @@ class WebScraping ():
             
         self.refresh_selenium()
 
+    def wait_until(self, condition, time_out: float = 10,
+                   poll_interval: float = 0.1) -> bool:
+        """ Poll a condition until it is true or the time out is reached
+
+        Args:
+            condition (callable): function without arguments that returns a bool
+            time_out (float): max seconds to wait
+            poll_interval (float): seconds between checks
+
+        Returns:
+            bool: True if the condition was met, False if time out
+        """
+
+        end_time = time.monotonic() + time_out
+        while True:
+            try:
+                if condition():
+                    return True
+            except Exception:
+                # Page in transition (stale elements, navigation): check again
+                pass
+
+            if time.monotonic() >= end_time:
+                return False
+            time.sleep(poll_interval)
+
+    def is_visible(self, selector: str) -> bool:
+        """ Validate if an element exists and is rendered in the page
+
+        Args:
+            selector (str): CSS selector of the element
+
+        Returns:
+            bool: True if the element is visible
+        """
+
+        script = """
+        const elem = document.querySelector(arguments[0]);
+        return Boolean(elem && elem.getClientRects().length);
+        """
+        return bool(self.driver.execute_script(script, selector))
+
+    def wait_visible(self, selector: str, time_out: float = 10) -> bool:
+        """ Wait until an element is rendered in the page
+
+        Args:
+            selector (str): CSS selector of the element
+            time_out (float): max seconds to wait
+
+        Returns:
+            bool: True if the element is visible, False if time out
+        """
+
+        return self.wait_until(lambda: self.is_visible(selector), time_out)
+
+    def wait_hidden(self, selector: str, time_out: float = 10) -> bool:
+        """ Wait until an element is removed or hidden from the page
+
+        Args:
+            selector (str): CSS selector of the element
+            time_out (float): max seconds to wait
+
+        Returns:
+            bool: True if the element is not visible, False if time out
+        """
+
+        return self.wait_until(lambda: not self.is_visible(selector), time_out)
+
+    def get_angular_pending(self) -> int:
+        """ Return the number of pending angular $http requests
+
+        Returns:
+            int: pending requests (0 if the page is not an angular app)
+        """
+
+        script = """
+        if (!window.angular) {
+            return 0;
+        }
+        const root = document.querySelector('[ng-app], [data-ng-app]') || document.body;
+        const injector = angular.element(root).injector();
+        if (!injector) {
+            return 0;
+        }
+        return injector.get('$http').pendingRequests.length;
+        """
+        return int(self.driver.execute_script(script) or 0)
+
+    def wait_angular(self, time_out: float = 10) -> bool:
+        """ Wait until angular has no pending $http requests
+
+        Args:
+            time_out (float): max seconds to wait
+
+        Returns:
+            bool: True if angular is idle, False if time out
+        """
+
+        return self.wait_until(lambda: self.get_angular_pending() == 0, time_out)
+
+    def wait_modal_open(self, selector: str, time_out: float = 10) -> bool:
+        """ Wait until a modal is visible and its data is loaded
+
+        Args:
+            selector (str): CSS selector of an element inside the modal
+            time_out (float): max seconds to wait
+
+        Returns:
+            bool: True if the modal is open, False if time out
+        """
+
+        start = time.monotonic()
+        if not self.wait_visible(selector, time_out):
+            return False
+
+        time_left = max(time_out - (time.monotonic() - start), 0)
+        return self.wait_angular(time_left)
+
+    def wait_modal_close(self, selector: str, time_out: float = 10) -> bool:
+        """ Wait until a modal and its backdrop are removed from the page
+
+        Args:
+            selector (str): CSS selector of an element inside the modal
+            time_out (float): max seconds to wait
+
+        Returns:
+            bool: True if the modal is closed, False if time out
+        """
+
+        script = """
+        const elem = document.querySelector(arguments[0]);
+        const visible = Boolean(elem && elem.getClientRects().length);
+        const backdrop = document.querySelector('.modal-backdrop');
+        return !visible && !backdrop && !document.body.classList.contains('modal-open');
+        """
+        return self.wait_until(
+            lambda: self.driver.execute_script(script, selector),
+            time_out
+        )
+
     def get_text(self, selector: str) -> str:
         """ Return text for specific element in the page
         
@@ -469,6 +783,37 @@ class WebScraping ():
 
         return texts
 
+    def get_texts_map(self, selectors: dict, attribs: dict = None) -> dict:
+        """ Return the text (or attribute) of many elements in a single js call
+
+        Args:
+            selectors (dict): field names and CSS selectors of the elements
+            attribs (dict): field names and html attributes to read instead of text
+
+        Returns:
+            dict: field names and texts (empty string if element not found)
+        """
+
+        script = """
+        const selectors = arguments[0];
+        const attribs = arguments[1];
+        const values = {};
+        for (const [field, selector] of Object.entries(selectors)) {
+            const elem = document.querySelector(selector);
+            let value = '';
+            if (elem && attribs[field]) {
+                value = elem[attribs[field]] || elem.getAttribute(attribs[field]) || '';
+            } else if (elem) {
+                value = (elem.innerText || '').trim();
+            }
+            values[field] = value;
+        }
+        return values;
+        """
+
+        values = self.driver.execute_script(script, selectors, attribs or {})
+        return {field: values.get(field, "") for field in selectors}
+
     def set_attrib(self, selector: str, attrib_name: str, attrib_value: str):
         """ Set a value in specific attribute of an element in the page
 
@@ -721,6 +1066,7 @@ class WebScraping ():
         windows = self.driver.window_handles
         self.driver.switch_to.window(windows[index])
 
+    @traced("refresh_selenium")
     def refresh_selenium(self, time_units: int = 1, back_tab: int = 0):
         """ Refresh the selenium data, creating and closing a new tab
         
@@ -743,6 +1089,77 @@ class WebScraping ():
         # Wait time
         time.sleep(self.basetime * time_units)
 
+    def get_network_responses(self, url_pattern: str) -> list:
+        """ Return the json responses captured in the network logs
+        (require capture_network=True)
+        
+        Args:
+            url_pattern (str): regex to filter the responses urls
+            
+        Returns:
+            list: json responses, in load order
+                [
+                    {
+                        url (str): url of the request
+                        data (dict or list): json body of the response
+                    }
+                ]
+        """
+        
+        # Save responses received since the last call, and their load state
+        for entry in self.driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method = message["method"]
+            request_id = message.get("params", {}).get("requestId")
+            
+            if method == "Network.loadingFinished":
+                if request_id in self.__network_pending__:
+                    self.__network_finished__.add(request_id)
+                continue
+            
+            if method == "Network.loadingFailed":
+                self.__network_pending__.pop(request_id, None)
+                self.__network_finished__.discard(request_id)
+                continue
+            
+            if method != "Network.responseReceived":
+                continue
+            
+            response = message["params"]["response"]
+            if "json" not in response.get("mimeType", ""):
+                continue
+            if not re.search(url_pattern, response["url"]):
+                continue
+            
+            self.__network_pending__[request_id] = response["url"]
+        
+        # Read bodies of the loaded responses (requests still loading are
+        # kept for the next call, bodies not available anymore, like after
+        # a page load, are discarded)
+        responses = []
+        for request_id, url in list(self.__network_pending__.items()):
+            if request_id not in self.__network_finished__:
+                continue
+            
+            del self.__network_pending__[request_id]
+            self.__network_finished__.discard(request_id)
+            try:
+                body = self.driver.execute_cdp_cmd(
+                    "Network.getResponseBody",
+                    {"requestId": request_id}
+                )
+            except Exception:
+                continue
+            
+            try:
+                data = json.loads(body["body"])
+            except ValueError:
+                print(f"Error: Invalid json response from {url}")
+                continue
+            responses.append({"url": url, "data": data})
+            
+        return responses
+
     def save_page(self, file_html: os.path):
         """ Save current page in local file
         
@@ -0,0 +1,210 @@
+import queue
+import traceback
+import multiprocessing
+
+from libs.scraper import Scraper
+from libs.cache_manager import CacheManager
+from libs.pipeline import handle_message
+from libs.rate_limiter import AdaptiveRateLimiter
+from libs.timing import tracer
+from libs.browser_daemon import ensure_browser, get_worker_address
+
+
+def scrape_shard(worker: int, workers_num: int, start_page: int,
+                 settings: dict, messages: multiprocessing.Queue):
+    """ Scrape the results pages of a worker (pages where
+    (page - 1) % workers_num == worker) and send the data to the writer
+
+    Args:
+        worker (int): id of the worker, from 0 to workers_num - 1
+        workers_num (int): total number of workers
+        start_page (int): first page to scrape (worker checkpoint)
+        settings (dict): scraper settings
+            {
+                page_link (str): link to the first results page
+                headless (bool): run the browser in headless mode
+                fast_mode (bool): read properties from angular scope
+                capture_mode (bool): read properties from the api responses
+                wait_seconds (int): seconds to wait after each property
+                wait_seconds_min (float): min seconds between properties
+                wait_seconds_max (float): max seconds between properties
+                fixtures_folder (str): folder to save the captured responses
+                block_resources (bool): block images, fonts and analytics
+                blocked_urls (list): other url patterns to block
+                debugger_address (str): address of the warm browser of the
+                    first worker (host:port), the next ports for the others
+                trace_path (str): path of the JSONL timing trace (optional)
+                trace_summary_seconds (int): seconds between timing summaries
+                job (str): name of the job, added to the messages (optional,
+                    see JobScheduler)
+                browser_slot (int): slot of the warm browser to use
+                    (optional, default the worker id)
+                skip_accounts (set): account keys to skip before open
+                    their details (optional, like the input sheet accounts)
+            }
+        messages (multiprocessing.Queue): queue to send data to the writer
+    """
+
+    def send(message: dict):
+        if settings.get("job"):
+            message["job"] = settings["job"]
+        messages.put(message)
+
+    scraper = None
+    try:
+        tracer.configure(settings.get("trace_path", ""),
+                         settings.get("trace_summary_seconds", 300))
+        rate_limiter = AdaptiveRateLimiter(
+            settings.get("wait_seconds_min", settings["wait_seconds"]),
+            settings.get("wait_seconds_max", settings["wait_seconds"]),
+        )
+
+        # Reuse a warm browser by worker (started if it is not running)
+        debugger_address = settings.get("debugger_address", "")
+        if debugger_address:
+            browser_slot = settings.get("browser_slot", worker)
+            debugger_address = get_worker_address(debugger_address, browser_slot)
+            ensure_browser(debugger_address, settings["headless"])
+
+        scraper = Scraper(settings["page_link"], settings["headless"],
+                          settings["capture_mode"], rate_limiter,
+                          settings.get("block_resources", False),
+                          settings.get("blocked_urls", []),
+                          debugger_address)
+
+        # First page of the shard from the checkpoint, then every
+        # workers_num pages (with direct navigation to each page)
+        current_page = start_page + (worker - (start_page - 1)) % workers_num
+        while scraper.go_to_page(current_page):
+
+            print(f"Worker {worker}: scraping page {current_page}...")
+            send({
+                "type": "page",
+                "worker": worker,
+                "page_link": scraper.get_page_link(current_page),
+                "page_num": current_page,
+            })
+
+            page_properties = scraper.iter_page_properties(
+                settings["fast_mode"],
+                settings["wait_seconds"],
+                settings["fixtures_folder"],
+                settings.get("skip_accounts", set())
+            )
+            for data in page_properties:
+                send({
+                    "type": "property",
+                    "worker": worker,
+                    "data": data,
+                })
+
+            current_page += workers_num
+
+        send({
+            "type": "done",
+            "worker": worker,
+            "page_link": scraper.get_page_link(current_page),
+            "page_num": current_page,
+        })
+
+    except BaseException:
+        send({
+            "type": "error",
+            "worker": worker,
+            "error": traceback.format_exc(),
+        })
+    finally:
+        # Stop the driver (and its chrome, if it is not a warm browser):
+        # the process ends without running the finalizers
+        try:
+            if scraper:
+                scraper.end_browser()
+        finally:
+            tracer.close()
+
+
+def get_pending_shards(cache: CacheManager, workers_num: int) -> list:
+    """ Return the workers with pending pages and their first page (all
+    workers start again from the first page when the last run finished)
+
+    Args:
+        cache (CacheManager): checkpoints of the scraping
+        workers_num (int): number of workers
+
+    Returns:
+        list: workers ids and start pages [(worker, start_page)]
+    """
+
+    cache.reset_workers_cache(workers_num)
+    workers_cache = [cache.get_worker_cache(worker)
+                     for worker in range(workers_num)]
+    if all(worker_cache["finished"] for worker_cache in workers_cache):
+        for worker in range(workers_num):
+            cache.update_page_cache("", 1, False, worker)
+        workers_cache = [cache.get_worker_cache(worker)
+                         for worker in range(workers_num)]
+
+    return [
+        (worker, worker_cache["last_page_num"])
+        for worker, worker_cache in enumerate(workers_cache)
+        if not worker_cache["finished"]
+    ]
+
+
+def run_worker_pool(workers_num: int, cache: CacheManager, sinks: list,
+                    settings: dict):
+    """ Start the scraping workers (one browser per process) and save
+    in the sinks (from this process) the data sent by them
+
+    Args:
+        workers_num (int): number of workers
+        cache (CacheManager): checkpoints of the scraping
+        sinks (list): destinations of the properties (single writer)
+        settings (dict): scraper settings (see scrape_shard)
+    """
+
+    # Start workers with pending pages
+    messages = multiprocessing.Queue(maxsize=workers_num * 20)
+    processes = {}
+    for worker, start_page in get_pending_shards(cache, workers_num):
+        print(f"Starting worker {worker} from page {start_page}...")
+        process = multiprocessing.Process(
+            target=scrape_shard,
+            args=(worker, workers_num, start_page, settings, messages),
+            daemon=True,
+        )
+        process.start()
+        processes[worker] = process
+
+    # Save data sent by workers until all of them finish
+    # (pending records are saved in the sinks at each page and at the end)
+    try:
+        running = set(processes)
+        while running:
+            try:
+                message = messages.get(timeout=5)
+            except queue.Empty:
+
+                # Stop waiting workers that died without a message
+                for worker in list(running):
+                    if not processes[worker].is_alive():
+                        print(f"Error: Worker {worker} stopped unexpectedly.")
+                        running.discard(worker)
+                continue
+
+            worker = message["worker"]
+            if message["type"] == "error":
+                print(f"Error: Worker {worker} failed:\n{message['error']}")
+                running.discard(worker)
+                continue
+
+            handle_message(cache, sinks, message)
+            if message["type"] == "done":
+                print(f"Worker {worker}: no more results. Done.")
+                running.discard(worker)
+    finally:
+        for sink in sinks:
+            sink.page_done()
+
+    for process in processes.values():
+        process.join()